@@ -0,0 +1,158 @@
+"""
+Локальная замена API бирж для бенчмарков.
+
+Сервер отвечает в форматах Coinbase exchange-rates и Binance ticker/price и рассылает поток !miniTicker@arr.
+Курсы либо синтетические (случайное блуждание), либо воспроизводятся из записанной ленты.
+"""
+import asyncio
+import random
+from json import dumps
+from time import time
+
+from aiohttp import web
+
+from .feed import FeedReplay
+
+
+class MockExchange:
+    """
+    Имитирует биржу с настраиваемой задержкой ответа, долей ошибок и количеством активов.
+
+    Адреса: /v2/exchange-rates?currency=<база>, /api/v3/ticker/price и WebSocket /ws.
+    """
+    __slots__ = (
+        'prices', 'latency', 'error_rate', 'stream_interval', 'changed_share', 'replay', 'requests', 'errors',
+        'runner', 'url', 'sockets', 'task', '_started'
+    )
+
+    def __init__(
+            self, assets: int = 100, latency: float = 0.0, error_rate: float = 0.0, stream_interval: float = 0.1,
+            changed_share: float = 0.3, replay: FeedReplay | None = None
+    ):
+        self.prices: dict[str, float] = {'USDT': 1.0, 'USD': 1.0}
+        self.prices.update({f'A{i}': random.uniform(0.01, 60_000) for i in range(assets)})
+        self.latency = latency
+        self.error_rate = error_rate
+        self.stream_interval = stream_interval
+        self.changed_share = changed_share
+        self.replay = replay
+        self.requests = 0
+        self.errors = 0
+        self.runner: web.AppRunner | None = None
+        self.url = ''
+        self.sockets: set[web.WebSocketResponse] = set()
+        self.task: asyncio.Task | None = None
+        self._started = 0.0
+
+    @property
+    def assets(self) -> list[str]:
+        """Возвращает названия синтетических активов."""
+        return [name for name in self.prices if name.startswith('A')]
+
+    def move_prices(self) -> list[str]:
+        """Сдвигает заданную долю курсов и возвращает названия изменившихся активов."""
+        moved: list[str] = [name for name in self.assets if random.random() < self.changed_share]
+        for name in moved:
+            self.prices[name] *= random.uniform(0.999, 1.001)
+        return moved
+
+    def get_rates(self, base: str) -> dict[str, str] | None:
+        """Возвращает таблицу exchange-rates для базовой валюты."""
+        if self.replay is not None:
+            return self.replay.get('coinbase', base, time() - self._started)
+        if base not in self.prices:
+            return None
+        return {name: str(self.prices[base] / price) for name, price in self.prices.items()}
+
+    def get_ticker(self, names: list[str] | None = None) -> dict[str, str]:
+        """Возвращает цены торговых пар к USDT в формате Binance."""
+        if self.replay is not None:
+            return self.replay.get('binance', 'ticker', time() - self._started) or {}
+        return {f'{name}USDT': str(self.prices[name]) for name in (self.assets if names is None else names)}
+
+    async def _get_failure(self) -> web.Response | None:
+        """Выдерживает задержку ответа и с заданной вероятностью возвращает ошибку."""
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({'errors': [{'id': 'unavailable'}]}, status=503)
+        return None
+
+    async def _handle_rates(self, request: web.Request) -> web.Response:
+        """Отвечает в формате Coinbase exchange-rates."""
+        failure: web.Response | None = await self._get_failure()
+        if failure is not None:
+            return failure
+        base: str = request.query.get('currency', '')
+        rates: dict[str, str] | None = self.get_rates(base)
+        if rates is None:
+            return web.json_response({'errors': [{'id': 'not_found'}]}, status=400)
+        return web.json_response({'data': {'currency': base, 'rates': rates}})
+
+    async def _handle_ticker(self, _request: web.Request) -> web.Response:
+        """Отвечает в формате Binance ticker/price."""
+        failure: web.Response | None = await self._get_failure()
+        if failure is not None:
+            return failure
+        return web.json_response([{'symbol': symbol, 'price': price} for symbol, price in self.get_ticker().items()])
+
+    async def _handle_stream(self, request: web.Request) -> web.WebSocketResponse:
+        """Подключает клиента к потоку !miniTicker@arr."""
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.sockets.add(websocket)
+        try:
+            async for _ in websocket:
+                pass
+        finally:
+            self.sockets.discard(websocket)
+        return websocket
+
+    async def _broadcast(self) -> None:
+        """Сдвигает курсы и рассылает изменившиеся цены с временем события в поле E, как Binance."""
+        previous: dict[str, str] = {}
+        while True:
+            await asyncio.sleep(self.stream_interval)
+            if self.replay is None:
+                ticker: dict[str, str] = self.get_ticker(self.move_prices())
+            else:
+                current: dict[str, str] = self.get_ticker()
+                ticker = {symbol: price for symbol, price in current.items() if previous.get(symbol) != price}
+                previous = current
+            if not ticker or not self.sockets:
+                continue
+            event_time: int = int(time() * 1000)
+            message: str = dumps([
+                {'e': '24hrMiniTicker', 'E': event_time, 's': symbol, 'c': price} for symbol, price in ticker.items()
+            ])
+            for websocket in list(self.sockets):
+                if not websocket.closed:
+                    await websocket.send_str(message)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запускает сервер на свободном порту и возвращает его адрес."""
+        app = web.Application()
+        app.router.add_get('/v2/exchange-rates', self._handle_rates)
+        app.router.add_get('/api/v3/ticker/price', self._handle_ticker)
+        app.router.add_get('/ws', self._handle_stream)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        self.url = f'http://{host}:{self.runner.addresses[0][1]}'
+        self._started = time()
+        self.task = asyncio.create_task(self._broadcast())
+        return self.url
+
+    async def stop(self) -> None:
+        """Отключает клиентов потока и останавливает сервер."""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        for websocket in list(self.sockets):
+            await websocket.close()
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
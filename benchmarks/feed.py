@@ -0,0 +1,90 @@
+"""
+Запись и воспроизведение лент курсов.
+
+Лента — файл JSON Lines: первая строка содержит список пар, остальные — таблицы курсов провайдеров
+с временем получения от начала записи. Запись ведётся через те же провайдеры и запросы, что и в программе.
+
+Запуск записи из корня проекта: python -m benchmarks.feed --duration 60 --output feed.jsonl
+"""
+import asyncio
+from argparse import ArgumentParser
+from bisect import bisect_right
+from json import dumps, loads
+from time import perf_counter
+
+from core.rates_manager import RatesManager
+
+
+class FeedReplay:
+    """Отдаёт записанные таблицы курсов по времени от начала воспроизведения, зацикливая ленту."""
+    __slots__ = ('pairs', 'duration', 'times', 'tables')
+
+    def __init__(self, path: str):
+        self.pairs: list[tuple[str, str]] = []
+        self.duration = 0.0
+        self.times: dict[tuple[str, str], list[float]] = {}
+        self.tables: dict[tuple[str, str], list[dict]] = {}
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                record: dict = loads(line)
+                if 'pairs' in record:
+                    self.pairs = [(coin, currency) for coin, currency in record['pairs']]
+                    continue
+                key: tuple[str, str] = (record['provider'], record['key'])
+                self.times.setdefault(key, []).append(record['time'])
+                self.tables.setdefault(key, []).append(record['table'])
+                self.duration = max(self.duration, record['time'])
+
+    def get(self, provider: str, key: str, elapsed: float) -> dict | None:
+        """Возвращает последнюю таблицу, записанную к моменту elapsed, или первую, если такой ещё нет."""
+        times: list[float] | None = self.times.get((provider, key))
+        if not times:
+            return None
+        if self.duration:
+            elapsed %= self.duration
+        return self.tables[(provider, key)][max(0, bisect_right(times, elapsed) - 1)]
+
+
+async def record_feed(manager: RatesManager, path: str, duration: float, interval: float) -> int:
+    """Записывает таблицы курсов для пар из конфигурации и возвращает количество записанных таблиц."""
+    pairs: list[tuple[str, str]] = [(coin, settings['currency']) for coin, settings in manager.coins.items()]
+    groups: dict[str, list[tuple[str, str]]] = {}
+    for coin, currency in pairs:
+        for source in manager._get_sources(manager.coins[coin]):
+            groups.setdefault(source, []).append((coin, currency))
+    recorded: int = 0
+    started: float = perf_counter()
+    await manager.open_session()
+    try:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(dumps({'pairs': pairs}) + '\n')
+            while perf_counter() - started < duration:
+                for name, group in groups.items():
+                    for key in manager.rate_providers[name].plan(group):
+                        table: dict | None = await manager.get_rates(key, name)
+                        if table is not None:
+                            record: dict = {
+                                'time': perf_counter() - started, 'provider': name, 'key': key, 'table': table
+                            }
+                            file.write(dumps(record) + '\n')
+                            recorded += 1
+                await asyncio.sleep(interval)
+    finally:
+        await manager.close_session()
+    return recorded
+
+
+def main() -> None:
+    """Записывает ленту курсов реального API по настройкам из config.json."""
+    parser = ArgumentParser(description='Запись ленты курсов для воспроизведения в бенчмарках.')
+    parser.add_argument('--duration', type=float, default=60, help='длительность записи в секундах')
+    parser.add_argument('--interval', type=float, default=1, help='пауза между опросами в секундах')
+    parser.add_argument('--output', default='feed.jsonl', help='файл ленты')
+    arguments = parser.parse_args()
+    manager = RatesManager()
+    recorded: int = asyncio.run(record_feed(manager, arguments.output, arguments.duration, arguments.interval))
+    print(f'Записано таблиц: {recorded}, файл: {arguments.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Микробенчмарк состояния курсов: построчная обработка строк против колоночного RateState.
+
+Запуск из корня проекта: python -m benchmarks.rate_state
+"""
+import random
+from time import perf_counter
+
+from core.layout import Layout
+from core.rates_manager import RatesManager
+from core.visualisation import FrameBuffer
+
+SIZES: tuple[int, ...] = (75, 1_000, 10_000)
+TICKS: int = 50
+HEIGHT, WIDTH = 50, 120
+
+
+def create_ticks(size: int, ticks: int, changed_share: float = 0.3) -> list[list[float]]:
+    """Создаёт последовательность тиков, в каждом из которых меняется заданная доля курсов."""
+    rates: list[float] = [random.uniform(0.01, 60_000) for _ in range(size)]
+    result: list[list[float]] = []
+    for _ in range(ticks):
+        rates = [rate * random.uniform(0.999, 1.001) if random.random() < changed_share else rate for rate in rates]
+        result.append(rates)
+    return result
+
+
+def run_legacy(manager: RatesManager, pairs: list, ticks: list[list[float]], visible: range) -> float:
+    """Повторяет прежний путь: строки для всех пар и повторное преобразование в float для каждого поля."""
+    start_rates: list[float] = list(ticks[0])
+    previous_rates: list[float] = [0.0] * len(pairs)
+    frame = FrameBuffer()
+
+    def get_color(index: int, current: float, previous: float) -> str:
+        if current > previous:
+            return 'GREEN'
+        elif current < previous:
+            return 'RED'
+        elif current > start_rates[index]:
+            return 'GREEN'
+        elif current < start_rates[index]:
+            return 'RED'
+        return 'YELLOW'
+
+    started: float = perf_counter()
+    for tick in ticks:
+        rows: list[tuple] = [
+            (coin, currency, f'{float(rate):.{manager.max_coins_zero}f}', coin_color, currency_color)
+            for (coin, currency, coin_color, currency_color), rate in zip(pairs, tick)
+        ]
+        for i in visible:
+            coin, currency, rate, coin_color, currency_color = rows[i]
+            coin_name: str = manager._verify_name_length(coin, 5)
+            currency_name: str = manager._verify_name_length(currency, 4)
+            frame.addstr(i, 0, coin_name, manager.paint(coin_color, False))
+            frame.addstr(i, len(coin_name), '/', manager.paint(manager.marks_color, False))
+            frame.addstr(i, len(coin_name) + 1, currency_name, manager.paint(currency_color, False))
+            frame.addstr(i, len(coin_name + currency_name) + 1, ':', manager.paint(manager.marks_color, False))
+            frame.addstr(
+                i, len(coin_name + currency_name) + 3, manager._verify_rate_length(coin, currency, rate),
+                manager.paint(get_color(i, float(rate), previous_rates[i]), False)
+            )
+            difference: float = (float(rate) - start_rates[i]) / abs(start_rates[i]) * 100
+            percentage: str = f'{difference:.{manager.max_percent_zero}f}%'
+            x: float = manager._get_x_negative_percent(manager.x_percentage, percentage)
+            frame.addstr(
+                i, int(x), manager._format_percentage(percentage),
+                manager.paint(get_color(i, float(rate), previous_rates[i]), False)
+            )
+        previous_rates = [float(rate) for _, _, rate, _, _ in rows]
+        frame.current = {}
+    return perf_counter() - started
+
+
+def run_columnar(manager: RatesManager, pairs: list, ticks: list[list[float]], visible: range) -> float:
+    """Обновляет RateState одним векторным проходом и форматирует только видимые изменившиеся строки."""
+    manager.rate_state = manager.rate_state.__class__(len(pairs))
+    manager.rate_state.set_start(ticks[0])
+    frame = FrameBuffer()
+    started: float = perf_counter()
+    for tick in ticks:
+        manager.rate_state.update(tick)
+        for i in visible:
+            manager.display_rates(frame, i, i, 0, *pairs[i])
+        frame.current = {}
+    return perf_counter() - started
+
+
+def main() -> None:
+    """Сравнивает оба пути для разного количества пар и выводит время одного тика."""
+    manager = RatesManager()
+    manager.verify_config_colors()
+    manager.attributes = {(color, a_bold): i for i, color in enumerate(manager.colors) for a_bold in (False, True)}
+    print(f'{"пар":>8} {"построчно, мс":>15} {"RateState, мс":>15} {"ускорение":>10}')
+    for size in SIZES:
+        pairs: list = [(f'C{i}', 'USDT', 'BLUE', 'CYAN') for i in range(size)]
+        ticks: list[list[float]] = create_ticks(size, TICKS)
+        layout = Layout()
+        visible: range = layout.update(HEIGHT, WIDTH, size)
+        legacy: float = run_legacy(manager, pairs, ticks, visible) / TICKS * 1000
+        columnar: float = run_columnar(manager, pairs, ticks, visible) / TICKS * 1000
+        print(f'{size:>8} {legacy:>15.3f} {columnar:>15.3f} {legacy / columnar:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
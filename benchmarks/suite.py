@@ -0,0 +1,298 @@
+"""
+Бенчмарк получения, обработки и отрисовки курсов на локальной замене API биржи.
+
+Замеряются пропускная способность получения курсов, задержка тика от запроса до готового кадра,
+задержка потока от события биржи до пробуждения отрисовки и стоимость кадра на экране без терминала.
+Отдельно замеряется время запуска: импорт модулей программы в новом процессе.
+Результат записывается в JSON, чтобы сравнивать версии между собой.
+
+Запуск из корня проекта: python -m benchmarks.suite --pairs 1000 --latency 0.05 --output results.json
+Воспроизведение записанной ленты: python -m benchmarks.suite --replay feed.jsonl
+"""
+import asyncio
+import platform
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from json import dumps
+from time import perf_counter, time
+
+import aiohttp
+import numpy as np
+
+from core.providers import BinanceProvider
+from core.run import RunProgram
+from core.visualisation import FrameBuffer
+
+from .exchange import MockExchange
+from .feed import FeedReplay
+
+
+class BenchmarkProgram(RunProgram):
+    """Программа для замеров: не сохраняет начальные курсы, чтобы не затронуть файлы пользователя."""
+    __slots__ = ()
+
+    def save_start_rates(self) -> None:
+        pass
+
+
+class StreamProbe(BinanceProvider):
+    """Провайдер Binance, запоминающий время события последнего сообщения потока."""
+    __slots__ = ('event_time',)
+
+    def __init__(self, name: str, url: str, concurrency: int = 10, rate_limit: float = 0, stream_url: str = ''):
+        super().__init__(name, url, concurrency, rate_limit, stream_url)
+        self.event_time = 0.0
+
+    def parse_stream(self, data) -> dict:
+        items: list = data if isinstance(data, list) else [data]
+        self.event_time = max((item.get('E', 0) / 1000 for item in items if isinstance(item, dict)), default=0.0)
+        return super().parse_stream(data)
+
+
+class FakeScreen:
+    """Экран без терминала с интерфейсом окна curses, считающий обновления."""
+    __slots__ = ('height', 'width', 'updates')
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.updates = 0
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.height, self.width
+
+    def addstr(self, _y: int, _x: int, text: str, _attribute: int = 0) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def noutrefresh(self) -> None:
+        pass
+
+    def update(self) -> None:
+        self.updates += 1
+
+
+def get_percentiles(values: list[float]) -> dict[str, float | int]:
+    """Возвращает количество замеров и перцентили в миллисекундах."""
+    if not values:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, (50, 95, 99))
+    return {
+        'count': len(values), 'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3), 'max_ms': round(max(values) * 1000, 3)
+    }
+
+
+def get_revision() -> str | None:
+    """Возвращает текущий коммит git, если он доступен."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def create_program(
+        url: str, pairs: list[tuple[str, str]], screen: FakeScreen, rate_limit: float
+) -> BenchmarkProgram:
+    """Создаёт программу, опрашивающую замену API, с заданными парами и экраном без терминала."""
+    program = BenchmarkProgram()
+    program.history['enabled'] = False
+    program.sparkline_length = 0
+    program.rate_providers['coinbase'].url = f'{url}/v2/exchange-rates?currency='
+    program.rate_providers['coinbase'].rate_limit = rate_limit
+    program.rate_providers['binance'] = StreamProbe(
+        'binance', f'{url}/api/v3/ticker/price', stream_url=f'{url.replace("http", "ws", 1)}/ws'
+    )
+    program.coins = {
+        coin: {'currency': currency, 'coin_color': 'BLUE', 'currency_color': 'CYAN'} for coin, currency in pairs
+    }
+    program.pairs = program.create_pairs_list(program.coins)
+    program.verify_previous_rates(program.pairs)
+    program.verify_config_colors()
+    program.attributes = {(color, bold): i for i, color in enumerate(program.colors) for bold in (False, True)}
+    program.frame = FrameBuffer(screen.update)
+    return program
+
+
+async def measure_fetch(program: BenchmarkProgram, duration: float) -> dict:
+    """Замеряет, сколько пар в секунду программа получает полными опросами."""
+    pairs: list[tuple[str, str]] = [(coin, currency) for coin, currency, _, _ in program.pairs]
+    requests: int = program.connection_stats['requests']
+    rounds, resolved = 0, 0
+    started: float = perf_counter()
+    while perf_counter() - started < duration:
+        rates: list[float | None] = await program.get_pairs_rates(pairs)
+        resolved += sum(rate is not None for rate in rates)
+        rounds += 1
+    elapsed: float = perf_counter() - started
+    return {
+        'rounds': rounds, 'pairs_per_second': round(resolved / elapsed, 1),
+        'requests_per_second': round((program.connection_stats['requests'] - requests) / elapsed, 1),
+        'resolved_share': round(resolved / max(1, rounds * len(pairs)), 4)
+    }
+
+
+async def measure_requests(program: BenchmarkProgram, bases: list[str], duration: float) -> dict:
+    """Замеряет пропускную способность одиночных запросов через общий пул и лимиты провайдера."""
+    completed, failed = 0, 0
+    started: float = perf_counter()
+    while perf_counter() - started < duration:
+        tables: list[dict | None] = await asyncio.gather(*(program.get_rates(base) for base in bases))
+        completed += sum(table is not None for table in tables)
+        failed += sum(table is None for table in tables)
+        program.scheduler.blocked_until.clear()
+    elapsed: float = perf_counter() - started
+    return {
+        'requests_per_second': round((completed + failed) / elapsed, 1), 'failed': failed,
+        'connection_stats': dict(program.connection_stats)
+    }
+
+
+async def measure_ticks(program: BenchmarkProgram, screen: FakeScreen, ticks: int) -> dict:
+    """Замеряет задержку тика: опрос всех пар, обновление состояния и вывод кадра."""
+    durations: list[float] = []
+    for _ in range(ticks):
+        program.scheduler.resize(len(program.pairs))
+        program.scheduler.next_due[:] = 0
+        started: float = perf_counter()
+        await program.refresh_rates()
+        program.draw_frame(screen)
+        durations.append(perf_counter() - started)
+    return get_percentiles(durations)
+
+
+def measure_render(program: BenchmarkProgram, screen: FakeScreen, frames: int, changed_share: float) -> dict:
+    """Замеряет стоимость кадра без сети, когда между кадрами меняется заданная доля курсов."""
+    rates: np.ndarray = np.where(np.isnan(program.rate_state.current), 1.0, program.rate_state.current)
+    durations: list[float] = []
+    cells: int = 0
+    for _ in range(frames):
+        changed: np.ndarray = np.random.random(len(rates)) < changed_share
+        rates = np.where(changed, rates * np.random.uniform(0.999, 1.001, len(rates)), rates)
+        program.rate_state.update(rates)
+        started: float = perf_counter()
+        cells += program.draw_frame(screen)
+        durations.append(perf_counter() - started)
+    return {
+        **get_percentiles(durations), 'cells_per_frame': round(cells / max(1, frames), 1),
+        'full_redraws': program.frame.full_redraws
+    }
+
+
+async def measure_stream(program: BenchmarkProgram, duration: float) -> dict:
+    """Замеряет задержку от события в потоке биржи до пробуждения отрисовки."""
+    probe: StreamProbe = program.rate_providers['binance']
+    for settings in program.coins.values():
+        settings['provider'] = 'binance'
+    program.create_streams(program.pairs)
+    if not program.streams:
+        return {'count': 0}
+    latencies: list[float] = []
+    task: asyncio.Task = asyncio.create_task(program.create_stream_loop(program.streams[0]))
+    started: float = perf_counter()
+    try:
+        while perf_counter() - started < duration:
+            await program.wait_for_data(1.0)
+            if probe.event_time and program.streams[0].connected:
+                latencies.append(max(0.0, time() - probe.event_time))
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return {**get_percentiles(latencies), 'messages': program.streams[0].messages}
+
+
+def measure_startup(runs: int) -> dict:
+    """
+    Замеряет время импорта модулей программы в новом процессе
+    и проверяет, что тяжёлые зависимости (aiohttp, curses) не импортируются при запуске.
+    """
+    code: str = (
+        'import sys, time; started = time.perf_counter(); import core.run; '
+        'print(time.perf_counter() - started, "aiohttp" in sys.modules, "curses" in sys.modules)'
+    )
+    durations: list[float] = []
+    loaded: set[str] = set()
+    for _ in range(runs):
+        duration, aiohttp_loaded, curses_loaded = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True
+        ).stdout.split()
+        durations.append(float(duration))
+        loaded.update(name for name, flag in (('aiohttp', aiohttp_loaded), ('curses', curses_loaded)) if flag == 'True')
+    return {**get_percentiles(durations), 'loaded': sorted(loaded)}
+
+
+async def run_suite(arguments: Namespace) -> dict:
+    """Запускает замену API и все замеры."""
+    replay: FeedReplay | None = FeedReplay(arguments.replay) if arguments.replay else None
+    exchange = MockExchange(
+        arguments.pairs, arguments.latency, arguments.error_rate, arguments.stream_interval, arguments.changed_share,
+        replay
+    )
+    url: str = await exchange.start()
+    pairs: list[tuple[str, str]] = replay.pairs if replay is not None else [
+        (asset, 'USDT') for asset in exchange.assets
+    ]
+    screen = FakeScreen(arguments.height, arguments.width)
+    program: BenchmarkProgram = create_program(url, pairs, screen, arguments.rate_limit)
+    try:
+        await program.open_session()
+        results: dict = {
+            'fetch': await measure_fetch(program, arguments.duration),
+            'requests': await measure_requests(program, [coin for coin, _ in pairs], arguments.duration),
+            'tick_latency': await measure_ticks(program, screen, arguments.ticks),
+            'render': measure_render(program, screen, arguments.frames, arguments.changed_share),
+            'stream_latency': await measure_stream(program, arguments.duration)
+        }
+    finally:
+        await program.close_session()
+        await exchange.stop()
+    results['exchange'] = {'requests': exchange.requests, 'errors': exchange.errors}
+    results['startup'] = measure_startup(arguments.startup_runs)
+    return results
+
+
+def get_arguments() -> Namespace:
+    """Разбирает аргументы командной строки."""
+    parser = ArgumentParser(description='Бенчмарк CoinMonitor на локальной замене API биржи.')
+    parser.add_argument('--pairs', type=int, default=100, help='количество синтетических пар')
+    parser.add_argument('--latency', type=float, default=0.02, help='средняя задержка ответа в секундах')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов с ошибкой 503')
+    parser.add_argument('--stream-interval', type=float, default=0.1, help='период сообщений потока в секундах')
+    parser.add_argument('--changed-share', type=float, default=0.3, help='доля курсов, меняющихся за тик')
+    parser.add_argument(
+        '--rate-limit', type=float, default=0, help='лимит запросов в секунду к Coinbase (0 — без ограничения)'
+    )
+    parser.add_argument('--duration', type=float, default=5, help='длительность замеров пропускной способности')
+    parser.add_argument('--ticks', type=int, default=50, help='количество замеряемых тиков')
+    parser.add_argument('--frames', type=int, default=200, help='количество замеряемых кадров')
+    parser.add_argument('--startup-runs', type=int, default=5, help='количество замеров времени запуска')
+    parser.add_argument('--height', type=int, default=50, help='высота экрана')
+    parser.add_argument('--width', type=int, default=120, help='ширина экрана')
+    parser.add_argument('--replay', help='лента курсов, записанная python -m benchmarks.feed')
+    parser.add_argument('--output', help='файл результатов JSON (по умолчанию вывод в консоль)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Выполняет замеры и сохраняет результат вместе с параметрами запуска и версиями окружения."""
+    arguments: Namespace = get_arguments()
+    report: dict = {
+        'revision': get_revision(), 'created_at': time(), 'python': platform.python_version(),
+        'aiohttp': aiohttp.__version__, 'numpy': np.__version__, 'parameters': vars(arguments),
+        'results': asyncio.run(run_suite(arguments))
+    }
+    text: str = dumps(report, ensure_ascii=False, indent=4)
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
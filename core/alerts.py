@@ -0,0 +1,142 @@
+from time import time, monotonic
+
+import numpy as np
+
+from .rate_state import RateState
+
+
+class AlertEngine:
+    """
+    Проверяет правила оповещений сразу для всех пар одним векторным проходом.
+
+    Правила компилируются один раз в строки (правило, пара), а каждый тик для всех строк
+    вычисляется одна маска условий. Оповещение срабатывает, когда условие становится истинным,
+    и повторяется не раньше чем через cooldown секунд после того, как условие снова стало ложным.
+    """
+    __slots__ = (
+        'cooldown', 'window_interval', 'rules', 'kinds', 'pairs', 'values', 'windows', 'labels', 'keys', 'masks',
+        'window_masks', 'active', 'cleared_at', 'window_rates', 'window_time'
+    )
+    kinds_list: tuple[str, ...] = ('above', 'below', 'change', 'move', 'stale')
+
+    def __init__(self, cooldown: float = 300.0, window_interval: float = 60.0):
+        self.cooldown = cooldown
+        self.window_interval = window_interval
+        self.rules: list[dict] = []
+        self.kinds = np.zeros(0, dtype=np.int8)
+        self.pairs = np.zeros(0, dtype=np.intp)
+        self.values = np.zeros(0)
+        self.windows = np.zeros(0)
+        self.labels: list[str] = []
+        self.keys: list[tuple[int, float, float, str]] = []
+        self.masks: dict[str, np.ndarray] = {}
+        self.window_masks: dict[float, np.ndarray] = {}
+        self.active = np.zeros(0, dtype=bool)
+        self.cleared_at = np.zeros(0)
+        self.window_rates: dict[float, np.ndarray] = {}
+        self.window_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @staticmethod
+    def _verify_rule(rule: dict) -> None:
+        """Проверяет тип и параметры правила."""
+        if rule.get('type') not in AlertEngine.kinds_list:
+            raise ValueError(f'Неизвестный тип оповещения «{rule.get("type")}»!')
+        if not isinstance(rule.get('value'), (int, float)):
+            raise ValueError(f'Не указано числовое значение value для оповещения {rule}!')
+        if rule['type'] == 'move' and not rule.get('window'):
+            raise ValueError(f'Не указано окно window в секундах для оповещения {rule}!')
+
+    def compile(self, rules: list[dict], pairs: list[tuple[str, str, str, str]]) -> None:
+        """
+        Разворачивает правила в строки по парам: pair задаёт пару вида "BTC/USDT",
+        а "*" или отсутствие pair — все пары. Строки, которые были и до повторной компиляции,
+        сохраняют своё состояние, поэтому изменение списка пар не повторяет уже отправленные оповещения.
+        """
+        indexes: dict[str, int] = {f'{coin}/{currency}': index for index, (coin, currency, _, _) in enumerate(pairs)}
+        rows: list[tuple[int, int, float, float]] = []
+        labels: list[str] = []
+        for rule in rules:
+            self._verify_rule(rule)
+            target: str = rule.get('pair', '*')
+            if target != '*' and target not in indexes:
+                raise ValueError(f'Пара «{target}» из оповещения не найдена в списке монет!')
+            for index in (indexes.values() if target == '*' else (indexes[target],)):
+                rows.append((self.kinds_list.index(rule['type']), index, rule['value'], rule.get('window', 0)))
+                labels.append(f'{pairs[index][0]}/{pairs[index][1]}')
+        previous: dict[tuple[int, float, float, str], tuple[bool, float]] = dict(
+            zip(self.keys, zip(self.active.tolist(), self.cleared_at.tolist()))
+        )
+        self.keys = [(kind, value, window, label) for (kind, _, value, window), label in zip(rows, labels)]
+        self.labels = labels
+        self.rules = rules
+        self.kinds = np.array([row[0] for row in rows], dtype=np.int8)
+        self.pairs = np.array([row[1] for row in rows], dtype=np.intp)
+        self.values = np.array([row[2] for row in rows], dtype=float)
+        self.windows = np.array([row[3] for row in rows], dtype=float)
+        self.masks = {kind: self.kinds == code for code, kind in enumerate(self.kinds_list)}
+        self.window_masks = {
+            window: self.masks['move'] & (self.windows == window) for window in set(self.windows[self.masks['move']])
+        }
+        self.active = np.array([previous.get(key, (False, -np.inf))[0] for key in self.keys], dtype=bool)
+        self.cleared_at = np.array([previous.get(key, (False, -np.inf))[1] for key in self.keys], dtype=float)
+        self.window_rates = {}
+        self.window_time = 0.0
+
+    def update_windows(self, get_rates) -> None:
+        """Раз в window_interval секунд запрашивает курсы пар на начало каждого окна."""
+        if monotonic() < self.window_time:
+            return
+        self.window_time = monotonic() + self.window_interval
+        self.window_rates = {window: get_rates(window) for window in self.window_masks}
+
+    def get_conditions(self, state: RateState) -> np.ndarray:
+        """Вычисляет маску выполненных условий для всех строк правил."""
+        current: np.ndarray = state.current[self.pairs]
+        conditions: np.ndarray = np.zeros(len(self), dtype=bool)
+        masks: dict[str, np.ndarray] = self.masks
+        with np.errstate(invalid='ignore', divide='ignore'):
+            conditions[masks['above']] = current[masks['above']] >= self.values[masks['above']]
+            conditions[masks['below']] = current[masks['below']] <= self.values[masks['below']]
+            change: np.ndarray = np.abs(state.change[self.pairs[masks['change']]])
+            conditions[masks['change']] = change >= self.values[masks['change']]
+            for window, rates in self.window_rates.items():
+                mask: np.ndarray = self.window_masks[window]
+                start: np.ndarray = rates[self.pairs[mask]]
+                conditions[mask] = np.abs((current[mask] - start) / np.abs(start) * 100) >= self.values[mask]
+            stale: np.ndarray = monotonic() - state.received_at[self.pairs[masks['stale']]]
+            conditions[masks['stale']] = stale >= self.values[masks['stale']]
+        return conditions
+
+    def evaluate(self, state: RateState) -> list[dict]:
+        """
+        Проверяет все правила и возвращает новые оповещения.
+        Отсрочка повтора отсчитывается от момента, когда условие сработавшего оповещения перестало выполняться.
+        """
+        if not len(self) or len(state) <= int(self.pairs.max()):
+            return []
+        now: float = monotonic()
+        conditions: np.ndarray = self.get_conditions(state)
+        self.cleared_at[self.active & ~conditions] = now
+        fired: np.ndarray = conditions & ~self.active & (now - self.cleared_at >= self.cooldown)
+        self.active = np.where(fired | ~conditions, conditions, self.active)
+        return [self._create_alert(row, state) for row in np.flatnonzero(fired)]
+
+    def _create_alert(self, row: int, state: RateState) -> dict:
+        """Создаёт описание сработавшего оповещения."""
+        kind: str = self.kinds_list[self.kinds[row]]
+        rate: float = float(state.current[self.pairs[row]])
+        value: float = float(self.values[row])
+        descriptions: dict[str, str] = {
+            'above': f'курс {rate:.10g} не ниже {value:g}',
+            'below': f'курс {rate:.10g} не выше {value:g}',
+            'change': f'изменение от начального курса {state.change[self.pairs[row]]:.2f}% (порог {value:g}%)',
+            'move': f'изменение за {self.windows[row]:g} с не меньше {value:g}%, курс {rate:.10g}',
+            'stale': f'курс не поступал более {value:g} с'
+        }
+        return {
+            'time': time(), 'pair': self.labels[row], 'type': kind, 'value': value,
+            'rate': None if np.isnan(rate) else rate, 'message': f'{self.labels[row]}: {descriptions[kind]}'
+        }
@@ -4,7 +4,10 @@ from json import load, dump, JSONDecodeError
 
 
 class Base:
-    __slots__ = ('logger', 'config', 'variables', 'api', 'coins', 'marks_color')
+    __slots__ = (
+        'logger', 'config', 'variables', 'api', 'coins', 'marks_color', 'history', 'polling', 'providers', 'profiling',
+        'alerts', 'reload'
+    )
 
     def __init__(self):
         self.logger = getLogger()
@@ -18,20 +21,43 @@ class Base:
                 "LTC": {"currency": "USDT", "coin_color": "BLUE", "currency_color": "CYAN"},
                 "BNB": {"currency": "USDT", "coin_color": "BLUE", "currency_color": "CYAN"},
                 "SOL": {"currency": "USDT", "coin_color": "BLUE", "currency_color": "CYAN"}
-            }
+            },
+            "history": {"enabled": True, "capacity": 172800, "sparkline_length": 8, "baseline_window": 0},
+            "polling": {"min_interval": 0.5, "max_interval": 30, "max_backoff": 60, "max_concurrency": 20},
+            "providers": {
+                "coinbase": {"type": "coinbase", "concurrency": 10, "rate_limit": 10},
+                "binance": {
+                    "type": "binance", "url": "https://api.binance.com/api/v3/ticker/price",
+                    "concurrency": 1, "rate_limit": 1,
+                    "stream": False, "stream_url": "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+                }
+            },
+            "profiling": {"enabled": False, "window": 1000, "dump_interval": 60},
+            "alerts": {"rules": [], "cooldown": 300, "webhook": "", "command": ""},
+            "reload": {"enabled": True, "interval": 1}
         }
         self.variables = self.get_config_data('config')
         try:
-            self.api = self.variables['API']
-            self.coins = self.variables['coins']
-            self.marks_color = self.variables['marks_color']
+            self.set_variables(self.variables)
         except TypeError:
             print('\nTypeError! Переменные не могут быть инициализированы!')
 
+    def set_variables(self, variables: dict) -> None:
+        """Устанавливает переменные из конфигурации, дополняя необязательные разделы значениями по умолчанию."""
+        self.api = variables['API']
+        self.coins = variables['coins']
+        self.marks_color = variables['marks_color']
+        self.history = {**self.config['history'], **variables.get('history', {})}
+        self.polling = {**self.config['polling'], **variables.get('polling', {})}
+        self.providers = {**self.config['providers'], **variables.get('providers', {})}
+        self.profiling = {**self.config['profiling'], **variables.get('profiling', {})}
+        self.alerts = {**self.config['alerts'], **variables.get('alerts', {})}
+        self.reload = {**self.config['reload'], **variables.get('reload', {})}
+
     @staticmethod
     def create_directories() -> None:
         """Создаёт каталоги, игнорируя уже существующие."""
-        directories: tuple[str, str, str] = ('config_files', 'config_files/logs', 'icons')
+        directories: tuple[str, ...] = ('config_files', 'config_files/logs', 'config_files/history', 'icons')
         for directory in directories:
             try:
                 os.mkdir(directory)
@@ -83,9 +109,18 @@ class Base:
             print(f'\nOSError! Не удалось прочитать файл «{config_name}.json» из-за {e}')
             return None
 
-    def get_logging_data(self) -> None:
-        """Загружает и применяет конфигурацию логирования из JSON-файла."""
-        config.dictConfig(self.get_json_data('config_files/logs', 'logging'))
+    def get_logging_data(self, log_name: str | None = None) -> None:
+        """
+        Загружает и применяет конфигурацию логирования из JSON-файла.
+        Если указано имя log_name, файловый журнал пишется в отдельный файл в режиме дозаписи,
+        чтобы процесс, работающий рядом с другими (брокер курсов), не терял записи при их запуске.
+        """
+        logging_data: dict = self.get_json_data('config_files/logs', 'logging')
+        file_handler: dict | None = logging_data.get('handlers', {}).get('file')
+        if log_name is not None and file_handler is not None:
+            file_handler['filename'] = os.path.join('config_files/logs', f'{log_name}.log')
+            file_handler['mode'] = 'a'
+        config.dictConfig(logging_data)
 
     def log_app_release(self, name: str, version: str, year: int) -> None:
         """Логирует заголовок приложения в один info-вызов."""
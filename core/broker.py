@@ -0,0 +1,170 @@
+import os
+import asyncio
+from json import dumps, loads, JSONDecodeError
+from math import inf
+from time import monotonic
+
+
+class RateBroker:
+    """
+    Рассылает курсы подписчикам через Unix-сокет.
+
+    Каждое сообщение — строка JSON. Новый подписчик сначала получает полный снимок курсов,
+    затем только изменившиеся пары. Пара, курс которой снова получен, но не изменился,
+    повторяется не чаще раза в refresh_interval секунд, чтобы подписчики отличали застывший курс от пропавшего.
+    """
+    __slots__ = ('path', 'server', 'writers', 'rates', 'updated_at', 'buffer_limit', 'refresh_interval', 'sent_at')
+
+    def __init__(self, path: str, buffer_limit: int = 1 << 20, refresh_interval: float = 10.0):
+        self.path = path
+        self.server: asyncio.AbstractServer | None = None
+        self.writers: set[asyncio.StreamWriter] = set()
+        self.rates: dict[str, float | None] = {}
+        self.updated_at = 0.0
+        self.buffer_limit = buffer_limit
+        self.refresh_interval = refresh_interval
+        self.sent_at: dict[str, float] = {}
+
+    @staticmethod
+    def _encode(message_type: str, updated_at: float, rates: dict[str, float | None]) -> bytes:
+        """Кодирует сообщение в строку JSON."""
+        return dumps({'type': message_type, 'updated_at': updated_at, 'rates': rates}).encode() + b'\n'
+
+    async def _remove_stale_socket(self) -> None:
+        """Удаляет файл сокета, оставшийся от завершившегося брокера, или сообщает о работающем."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        except OSError:
+            os.unlink(self.path)
+            return
+        writer.close()
+        raise RuntimeError(f'Брокер уже запущен: {self.path}')
+
+    async def _handle_client(self, _reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Отправляет подписчику полный снимок и добавляет его в рассылку."""
+        writer.write(self._encode('snapshot', self.updated_at, self.rates))
+        self.writers.add(writer)
+
+    async def start(self) -> None:
+        """Запускает сервер на Unix-сокете."""
+        await self._remove_stale_socket()
+        self.server = await asyncio.start_unix_server(self._handle_client, self.path)
+
+    def _send(self, message: bytes) -> None:
+        """Отправляет сообщение всем подписчикам, отключая закрытые и не успевающие читать."""
+        for writer in list(self.writers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > self.buffer_limit:
+                self.writers.discard(writer)
+                writer.close()
+                continue
+            writer.write(message)
+
+    def publish(self, rates: dict[str, float | None], updated_at: float, received_at: dict[str, float]) -> None:
+        """
+        Запоминает новые курсы и рассылает подписчикам изменившиеся, а также полученные заново пары,
+        которые не рассылались дольше refresh_interval секунд. received_at — время получения курса пары по monotonic.
+        """
+        now: float = monotonic()
+        delta: dict[str, float | None] = {
+            pair: rate for pair, rate in rates.items()
+            if pair not in self.rates or self.rates[pair] != rate or (
+                received_at.get(pair, -inf) > self.sent_at.get(pair, -inf)
+                and now - self.sent_at.get(pair, -inf) >= self.refresh_interval
+            )
+        }
+        self.rates = rates
+        self.updated_at = updated_at
+        if delta and self.writers:
+            self._send(self._encode('delta', updated_at, delta))
+            self.sent_at.update(dict.fromkeys(delta, now))
+
+    async def stop(self) -> None:
+        """Отключает подписчиков, останавливает сервер и удаляет файл сокета."""
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RateSubscriber:
+    """
+    Получает курсы от брокера через Unix-сокет.
+
+    Пока брокер недоступен, подключение повторяется не чаще одного раза в retry_interval секунд.
+    received_at хранит время последнего сообщения брокера с курсом каждой пары по monotonic.
+    """
+    __slots__ = ('path', 'rates', 'received_at', 'updated_at', 'task', 'retry_interval', 'retry_time')
+
+    def __init__(self, path: str, retry_interval: float = 5.0):
+        self.path = path
+        self.rates: dict[str, float | None] = {}
+        self.received_at: dict[str, float] = {}
+        self.updated_at = 0.0
+        self.task: asyncio.Task | None = None
+        self.retry_interval = retry_interval
+        self.retry_time = 0.0
+
+    @property
+    def connected(self) -> bool:
+        """Проверяет, получены ли курсы от брокера и активно ли подключение."""
+        return self.task is not None and not self.task.done() and bool(self.rates)
+
+    @property
+    def active(self) -> bool:
+        """Проверяет, что подключение к брокеру установлено, даже если курсы от него ещё не получены."""
+        return self.task is not None and not self.task.done()
+
+    async def _read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Читает сообщения брокера и применяет снимки и изменения курсов."""
+        try:
+            while line := await reader.readline():
+                try:
+                    message: dict = loads(line)
+                except JSONDecodeError:
+                    continue
+                if message.get('type') == 'snapshot':
+                    self.rates = dict(message['rates'])
+                else:
+                    self.rates.update(message['rates'])
+                self.received_at.update(
+                    dict.fromkeys((pair for pair, rate in message['rates'].items() if rate is not None), monotonic())
+                )
+                self.updated_at = message['updated_at']
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.rates = {}
+            self.received_at = {}
+            writer.close()
+
+    async def connect(self) -> bool:
+        """Подключается к брокеру, если подключения ещё нет и подошло время очередной попытки."""
+        if self.active:
+            return True
+        if monotonic() < self.retry_time or not hasattr(asyncio, 'open_unix_connection'):
+            return False
+        self.retry_time = monotonic() + self.retry_interval
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.path, limit=1 << 24)
+        except (OSError, NotImplementedError):
+            return False
+        self.task = asyncio.create_task(self._read(reader, writer))
+        await asyncio.sleep(0)
+        return True
+
+    async def close(self) -> None:
+        """Отключается от брокера."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
@@ -0,0 +1,107 @@
+from math import isnan
+
+from .lazy import LazyModule
+
+web = LazyModule('aiohttp.web')
+
+
+class MetricsExporter:
+    """
+    Локальный HTTP-сервер с последними курсами для фонового режима.
+
+    /metrics отдаёт данные в текстовом формате Prometheus, /rates — в JSON.
+    """
+    __slots__ = ('program', 'runner')
+
+    def __init__(self, program):
+        self.program = program
+        self.runner: web.AppRunner | None = None
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        """Экранирует значение метки Prometheus."""
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def get_rates(self) -> dict:
+        """Собирает снимок курсов, изменений и задержек получения данных."""
+        program = self.program
+        state = program.rate_state
+        pairs: list[dict] = []
+        for index, (coin, currency, _, _) in enumerate(program.pairs[:len(state)]):
+            rate, start, change = state.current[index], state.start[index], state.change[index]
+            pairs.append({
+                'pair': f'{coin}/{currency}', 'coin': coin, 'currency': currency,
+                'rate': None if isnan(rate) else float(rate),
+                'start_rate': None if isnan(start) else float(start),
+                'change_percent': None if isnan(change) else float(change)
+            })
+        return {
+            'updated_at': program.updated_at,
+            'tick_duration_seconds': program.tick_duration,
+            'fetch_latency_seconds': dict(program.fetch_latencies),
+            'connection_stats': dict(program.connection_stats),
+            'timings': program.profiler.get_summary(),
+            'alerts': list(program.recent_alerts),
+            'streams': {
+                stream.provider.name: {'connected': stream.connected, 'messages': stream.messages}
+                for stream in program.streams
+            },
+            'pairs': pairs
+        }
+
+    def get_metrics(self) -> str:
+        """Формирует метрики в текстовом формате Prometheus."""
+        snapshot: dict = self.get_rates()
+        lines: list[str] = [
+            '# HELP coinmonitor_rate Последний курс пары.', '# TYPE coinmonitor_rate gauge'
+        ]
+        for pair in snapshot['pairs']:
+            if pair['rate'] is not None:
+                lines.append(f'coinmonitor_rate{{pair="{self._escape(pair["pair"])}"}} {pair["rate"]!r}')
+        lines += [
+            '# HELP coinmonitor_change_percent Изменение курса относительно начального, %.',
+            '# TYPE coinmonitor_change_percent gauge'
+        ]
+        for pair in snapshot['pairs']:
+            if pair['change_percent'] is not None:
+                lines.append(
+                    f'coinmonitor_change_percent{{pair="{self._escape(pair["pair"])}"}} {pair["change_percent"]!r}'
+                )
+        lines += [
+            '# HELP coinmonitor_fetch_latency_seconds Длительность последнего запроса к API по базовой валюте.',
+            '# TYPE coinmonitor_fetch_latency_seconds gauge'
+        ]
+        for base, latency in snapshot['fetch_latency_seconds'].items():
+            lines.append(f'coinmonitor_fetch_latency_seconds{{base="{self._escape(base)}"}} {latency!r}')
+        lines += [
+            '# HELP coinmonitor_tick_duration_seconds Длительность последнего обновления всех курсов.',
+            '# TYPE coinmonitor_tick_duration_seconds gauge',
+            f'coinmonitor_tick_duration_seconds {snapshot["tick_duration_seconds"]!r}',
+            '# HELP coinmonitor_updated_timestamp_seconds Время последнего обновления курсов.',
+            '# TYPE coinmonitor_updated_timestamp_seconds gauge',
+            f'coinmonitor_updated_timestamp_seconds {snapshot["updated_at"]!r}'
+        ]
+        for name, value in snapshot['connection_stats'].items():
+            lines += [f'# TYPE coinmonitor_http_{name}_total counter', f'coinmonitor_http_{name}_total {value}']
+        return '\n'.join(lines) + '\n'
+
+    async def _handle_metrics(self, _request: 'web.Request') -> 'web.Response':
+        return web.Response(text=self.get_metrics(), content_type='text/plain', charset='utf-8')
+
+    async def _handle_rates(self, _request: 'web.Request') -> 'web.Response':
+        return web.json_response(self.get_rates())
+
+    async def start(self, host: str, port: int) -> None:
+        """Запускает HTTP-сервер."""
+        application = web.Application()
+        application.router.add_get('/metrics', self._handle_metrics)
+        application.router.add_get('/rates', self._handle_rates)
+        self.runner = web.AppRunner(application, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+
+    async def stop(self) -> None:
+        """Останавливает HTTP-сервер."""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
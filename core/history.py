@@ -0,0 +1,144 @@
+import os
+import mmap
+import struct
+
+try:
+    import resource
+except ModuleNotFoundError:
+    resource = None
+
+
+class TickHistory:
+    """
+    Кольцевой буфер тиков одной пары в файле, отображённом в память.
+
+    Файл состоит из заголовка (сигнатура, ёмкость, позиция записи, количество записей)
+    и записей фиксированного размера (время, курс). Открытие читает только заголовок,
+    поэтому не зависит от объёма накопленной истории. Файл закрывается сразу после отображения в память,
+    поэтому на пару приходится не больше одного дескриптора (начиная с Python 3.13 — ни одного).
+
+    История, открытая только для чтения, ничего не записывает в файл и перед каждым чтением
+    перечитывает заголовок, поэтому видит записи, которые добавляет другой процесс (брокер курсов).
+    """
+    __slots__ = ('path', 'capacity', 'head', 'count', 'readonly', '_map')
+    magic: bytes = b'CMHIST01'
+    header = struct.Struct('<8sQQQ')
+    record = struct.Struct('<dd')
+
+    def __init__(self, path: str, capacity: int, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self.capacity, self.head, self.count = capacity, 0, 0
+            self._map: mmap.mmap | None = None
+            self._refresh()
+            return
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as file:
+            try:
+                magic, file_capacity, head, count = self.header.unpack(file.read(self.header.size))
+            except struct.error:
+                magic, file_capacity, head, count = b'', 0, 0, 0
+            if magic != self.magic or not file_capacity:
+                file_capacity, head, count = capacity, 0, 0
+                file.truncate(self.header.size + capacity * self.record.size)
+            self._map = self._create_map(file)
+        self.capacity = file_capacity
+        self.head = head
+        self.count = count
+        self._write_header()
+
+    def __len__(self) -> int:
+        if self.readonly:
+            self._refresh()
+        return self.count
+
+    @staticmethod
+    def _create_map(file, access: int = mmap.ACCESS_WRITE) -> mmap.mmap:
+        """Отображает файл в память, не дублируя его дескриптор там, где mmap это поддерживает."""
+        try:
+            return mmap.mmap(file.fileno(), 0, access=access, trackfd=False)
+        except TypeError:
+            return mmap.mmap(file.fileno(), 0, access=access)
+
+    def _refresh(self) -> None:
+        """Перечитывает заголовок истории, открытой только для чтения, и отображает файл, когда он появится."""
+        if self._map is None:
+            try:
+                with open(self.path, 'rb') as file:
+                    self._map = self._create_map(file, mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return
+        try:
+            magic, capacity, head, count = self.header.unpack_from(self._map, 0)
+        except struct.error:
+            magic, capacity, head, count = b'', 0, 0, 0
+        if magic != self.magic or not capacity or len(self._map) < self.header.size + capacity * self.record.size:
+            self.count = 0
+            return
+        self.capacity, self.head, self.count = capacity, head, min(count, capacity)
+
+    @staticmethod
+    def reserve_files(count: int) -> None:
+        """
+        Поднимает мягкий лимит открытых файлов процесса в пределах жёсткого,
+        если в него не помещаются отображения count файлов истории.
+        """
+        if resource is None:
+            return
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed: int = count + 256
+        if soft == resource.RLIM_INFINITY or soft >= needed:
+            return
+        limit: int = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        if limit > soft:
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+            except (ValueError, OSError):
+                pass
+
+    def _write_header(self) -> None:
+        """Записывает заголовок с текущей позицией и количеством записей."""
+        self.header.pack_into(self._map, 0, self.magic, self.capacity, self.head, self.count)
+
+    def _read(self, position: int) -> tuple[float, float]:
+        """Читает запись по порядковому номеру от самой старой."""
+        index: int = (self.head - self.count + position) % self.capacity
+        return self.record.unpack_from(self._map, self.header.size + index * self.record.size)
+
+    def append(self, timestamp: float, price: float) -> None:
+        """Добавляет тик, перезаписывая самый старый при заполнении буфера."""
+        if self.readonly:
+            raise PermissionError(f'История открыта только для чтения: {self.path}')
+        self.record.pack_into(self._map, self.header.size + self.head * self.record.size, timestamp, price)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._write_header()
+
+    def tail(self, size: int) -> list[float]:
+        """Возвращает последние курсы в хронологическом порядке."""
+        if self.readonly:
+            self._refresh()
+        return [self._read(position)[1] for position in range(max(0, self.count - size), self.count)]
+
+    def find(self, timestamp: float) -> float | None:
+        """Возвращает курс, действовавший на указанный момент, или самый старый известный курс."""
+        if self.readonly:
+            self._refresh()
+        if not self.count:
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle: int = (low + high) // 2
+            if self._read(middle)[0] <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return self._read(max(0, low - 1))[1]
+
+    def close(self) -> None:
+        """Сбрасывает изменения на диск и закрывает отображение файла."""
+        if self._map is None:
+            return
+        if not self.readonly:
+            self._map.flush()
+        self._map.close()
@@ -0,0 +1,73 @@
+class Layout:
+    """
+    Раскладывает пары по колонкам в зависимости от размера терминала.
+
+    Отрисовывается только видимое окно пар, начиная со смещения offset,
+    поэтому стоимость кадра зависит от размера экрана, а не от общего числа пар.
+    Нижняя строка отводится под строку состояния, если пары не помещаются на экран или установлен status_row.
+    """
+    __slots__ = (
+        'column_width', 'min_width', 'top', 'left', 'offset', 'columns', 'rows', 'total', 'paged', 'status_row'
+    )
+
+    def __init__(self, column_width: int = 37, min_width: int = 34, top: int = 1, left: int = 1):
+        self.column_width = column_width
+        self.min_width = min_width
+        self.top = top
+        self.left = left
+        self.offset = 0
+        self.columns = 0
+        self.rows = 0
+        self.total = 0
+        self.paged = False
+        self.status_row = False
+
+    @property
+    def page_size(self) -> int:
+        """Возвращает количество пар, помещающихся на экране."""
+        return self.columns * self.rows
+
+    def _clamp_offset(self) -> None:
+        """Удерживает смещение в пределах списка пар."""
+        self.offset = max(0, min(self.offset, self.total - self.page_size))
+
+    def update(self, height: int, width: int, total: int) -> range:
+        """Пересчитывает сетку под размер экрана и возвращает диапазон видимых индексов пар."""
+        self.total = total
+        self.columns = max(0, (width - self.min_width) // self.column_width + 1) if width >= self.min_width else 0
+        self.rows = max(0, height - self.top)
+        self.paged = self.page_size < total
+        if self.paged or self.status_row:
+            self.rows = max(0, self.rows - 1)
+            self.paged = self.page_size < total
+        self._clamp_offset()
+        return range(self.offset, min(total, self.offset + self.page_size))
+
+    def position(self, index: int) -> tuple[int, int]:
+        """Возвращает координаты (y, x) пары с указанным индексом."""
+        column, row = divmod(index - self.offset, self.rows)
+        return self.top + row, self.left + column * self.column_width
+
+    def get_status(self) -> str:
+        """Возвращает строку с номерами видимых пар, если они не помещаются на экран."""
+        if not self.paged or not self.page_size:
+            return ''
+        return f'{self.offset + 1}-{min(self.total, self.offset + self.page_size)}/{self.total}'
+
+    def scroll(self, count: int) -> None:
+        """Сдвигает видимое окно на указанное количество пар."""
+        self.offset += count
+        self._clamp_offset()
+
+    def scroll_pages(self, count: int) -> None:
+        """Сдвигает видимое окно на указанное количество экранов."""
+        self.scroll(count * max(1, self.page_size))
+
+    def scroll_columns(self, count: int) -> None:
+        """Сдвигает видимое окно на указанное количество колонок."""
+        self.scroll(count * max(1, self.rows))
+
+    def scroll_to(self, index: int) -> None:
+        """Переходит к паре с указанным индексом."""
+        self.offset = index
+        self._clamp_offset()
@@ -0,0 +1,28 @@
+from importlib import import_module
+from importlib.util import find_spec
+
+
+class LazyModule:
+    """
+    Модуль, который импортируется при первом обращении к любому его атрибуту.
+
+    Тяжёлые зависимости (aiohttp, curses) не нужны до первого запроса или вывода на экран,
+    поэтому их импорт не задерживает запуск программы и первый кадр.
+    """
+    __slots__ = ('name', 'module')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attribute: str):
+        if self.module is None:
+            self.module = import_module(self.name)
+        return getattr(self.module, attribute)
+
+    def is_available(self) -> bool:
+        """Проверяет, что модуль установлен, не импортируя его."""
+        try:
+            return self.module is not None or find_spec(self.name) is not None
+        except ModuleNotFoundError:
+            return False
@@ -0,0 +1,89 @@
+class RatePlanner:
+    """
+    Планирует минимальный набор запросов exchange-rates для списка пар.
+
+    Ответ exchange-rates для одной базовой валюты содержит курсы всех валют относительно неё,
+    поэтому пары, валюты которых есть в одном ответе, обслуживаются одним вызовом,
+    а курс пары выводится локально: currency / coin относительно общей базы.
+    """
+    __slots__ = ('coverage', 'saved_calls', 'calls', '_pairs', '_assignment', '_unplanned', '_valid')
+
+    def __init__(self):
+        self.coverage: dict[str, frozenset[str]] = {}
+        self.saved_calls = 0
+        self.calls = 0
+        self._pairs: tuple[tuple[str, str], ...] = ()
+        self._assignment: dict[tuple[str, str], str] = {}
+        self._unplanned: set[tuple[str, str]] = set()
+        self._valid = False
+
+    @staticmethod
+    def _covers(base: str, coverage: frozenset[str] | dict | None, coin: str, currency: str) -> bool:
+        """Проверяет, можно ли получить курс пары из ответа для указанной базы."""
+        if coverage is None:
+            return base in (coin, currency)
+        return (coin == base or coin in coverage) and (currency == base or currency in coverage)
+
+    def _create_plan(self, pairs: tuple[tuple[str, str], ...]) -> dict[tuple[str, str], str]:
+        """Жадно подбирает базы, покрывающие наибольшее число ещё не покрытых пар, и закрепляет за ними пары."""
+        uncovered: set[tuple[str, str]] = set(pairs)
+        candidates: list[str] = sorted({name for pair in pairs for name in pair})
+        assignment: dict[tuple[str, str], str] = {}
+        while uncovered and candidates:
+            best_base, best_pairs = None, set()
+            for base in candidates:
+                coverage: frozenset[str] | None = self.coverage.get(base)
+                covered = {pair for pair in uncovered if self._covers(base, coverage, *pair)}
+                if len(covered) > len(best_pairs):
+                    best_base, best_pairs = base, covered
+            if best_base is None:
+                break
+            candidates.remove(best_base)
+            uncovered -= best_pairs
+            assignment.update(dict.fromkeys(best_pairs, best_base))
+        return assignment
+
+    def plan(self, pairs: list[tuple[str, str]]) -> list[str]:
+        """
+        Возвращает базы для запроса указанных пар.
+        План составляется для всех когда-либо запрошенных пар и пересчитывается только при появлении новых пар
+        или изменении покрытия, поэтому опрос части пар не требует нового плана.
+        """
+        if not self._valid or any(pair not in self._assignment and pair not in self._unplanned for pair in pairs):
+            self._pairs = tuple(dict.fromkeys(self._pairs + tuple(pairs)))
+            self._assignment = self._create_plan(self._pairs)
+            self._unplanned = set(self._pairs) - set(self._assignment)
+            self.calls = len(set(self._assignment.values()))
+            self.saved_calls = len(self._pairs) - self.calls
+            self._valid = True
+        return list(dict.fromkeys(self._assignment[pair] for pair in pairs if pair in self._assignment))
+
+    def get_base(self, pair: tuple[str, str]) -> str | None:
+        """Возвращает базу, за которой пара закреплена в текущем плане, или None, если пара не покрыта планом."""
+        return self._assignment.get(pair)
+
+    def forget(self, pairs: list[tuple[str, str]]) -> None:
+        """Исключает пары из плана."""
+        removed: set[tuple[str, str]] = set(pairs)
+        self._pairs = tuple(pair for pair in self._pairs if pair not in removed)
+        self._valid = False
+
+    def learn(self, base: str, rates: dict) -> None:
+        """Запоминает, какие валюты содержит ответ для базы, и сбрасывает план при изменении покрытия."""
+        coverage: frozenset[str] = frozenset(rates)
+        if self.coverage.get(base) != coverage:
+            self.coverage[base] = coverage
+            self._valid = False
+
+    def resolve(self, coin: str, currency: str, tables: dict[str, dict | None]) -> float | None:
+        """Вычисляет курс пары из первого подходящего полученного ответа."""
+        for base, rates in tables.items():
+            if rates is None or not self._covers(base, rates, coin, currency):
+                continue
+            try:
+                coin_rate: float = 1.0 if coin == base else float(rates[coin])
+                currency_rate: float = 1.0 if currency == base else float(rates[currency])
+                return currency_rate / coin_rate
+            except (TypeError, ValueError, ZeroDivisionError):
+                continue
+        return None
@@ -0,0 +1,102 @@
+import os
+from contextlib import nullcontext
+from json import dumps
+from time import time, monotonic, perf_counter
+
+import numpy as np
+
+
+class Span:
+    """Замер длительности участка кода, записываемый в профилировщик при выходе из блока with."""
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.profiler.record(self.name, perf_counter() - self.started)
+
+
+class Profiler:
+    """
+    Профилировщик горячих участков программы.
+
+    Для каждого участка хранится скользящее окно последних длительностей в кольцевом массиве,
+    по которому считаются p50, p95 и p99. Пока профилировщик выключен, span возвращает общий пустой
+    контекстный менеджер, а record сразу выходит, поэтому замеры почти ничего не стоят.
+    """
+    __slots__ = ('enabled', 'visible', 'window', 'dump_interval', 'dump_path', 'samples', 'counts', 'dump_time')
+    disabled_span = nullcontext()
+
+    def __init__(
+            self, enabled: bool = False, window: int = 1000, dump_interval: float = 60.0,
+            dump_path: str = 'config_files/logs/profile.jsonl'
+    ):
+        self.enabled = enabled
+        self.visible = False
+        self.window = window
+        self.dump_interval = dump_interval
+        self.dump_path = dump_path
+        self.samples: dict[str, np.ndarray] = {}
+        self.counts: dict[str, int] = {}
+        self.dump_time = monotonic() + dump_interval
+
+    def span(self, name: str) -> Span | nullcontext:
+        """Возвращает замер участка для блока with или пустой контекст, если профилировщик выключен."""
+        if not self.enabled:
+            return self.disabled_span
+        return Span(self, name)
+
+    def record(self, name: str, duration: float) -> None:
+        """Записывает длительность участка в его скользящее окно."""
+        if not self.enabled:
+            return
+        samples: np.ndarray | None = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = np.zeros(self.window)
+        count: int = self.counts.get(name, 0)
+        samples[count % self.window] = duration
+        self.counts[name] = count + 1
+
+    def toggle(self) -> None:
+        """Показывает или скрывает строку статистики, включая замеры при её показе."""
+        self.visible = not self.visible
+        if self.visible:
+            self.enabled = True
+
+    def get_summary(self) -> dict[str, dict[str, float | int]]:
+        """Возвращает количество замеров и перцентили длительности каждого участка в миллисекундах."""
+        summary: dict[str, dict[str, float | int]] = {}
+        for name, samples in self.samples.items():
+            count: int = self.counts[name]
+            p50, p95, p99 = np.percentile(samples[:min(count, self.window)] * 1000, (50, 95, 99))
+            summary[name] = {
+                'count': count, 'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3)
+            }
+        return summary
+
+    def get_status(self) -> str:
+        """Возвращает строку статистики: p50/p95/p99 каждого участка в миллисекундах."""
+        if not self.samples:
+            return ''
+        return ' '.join(
+            f'{name} {values["p50_ms"]:.1f}/{values["p95_ms"]:.1f}/{values["p99_ms"]:.1f}'
+            for name, values in self.get_summary().items()
+        ) + ' мс'
+
+    def dump(self) -> bool:
+        """Раз в dump_interval секунд дописывает статистику в файл и возвращает True, если запись выполнена."""
+        if not self.enabled or not self.samples or monotonic() < self.dump_time:
+            return False
+        self.dump_time = monotonic() + self.dump_interval
+        os.makedirs(os.path.dirname(self.dump_path), exist_ok=True)
+        with open(self.dump_path, 'a', encoding='utf-8') as file:
+            file.write(dumps({'time': time(), 'timings': self.get_summary()}) + '\n')
+        return True
@@ -0,0 +1,179 @@
+import asyncio
+from abc import ABC, abstractmethod
+from time import monotonic
+
+from .planner import RatePlanner
+
+
+class RateProvider(ABC):
+    """
+    Источник курсов.
+
+    Провайдер решает, какие запросы нужны для списка пар, разбирает ответы в таблицы курсов
+    и вычисляет курс пары из полученных таблиц. Число одновременных запросов к провайдеру
+    ограничено concurrency, а частота — rate_limit запросов в секунду.
+    Провайдер с supports_stream и адресом stream_url может вместо опроса получать курсы через WebSocket;
+    такой провайдер переопределяет методы потока, которые по умолчанию не дают курсов.
+    """
+    __slots__ = ('name', 'url', 'stream_url', 'semaphore', 'rate_limit', '_next_request')
+    supports_stream: bool = False
+
+    def __init__(
+            self, name: str, url: str, concurrency: int = 10, rate_limit: float = 10.0, stream_url: str | None = None
+    ):
+        self.name = name
+        self.url = url
+        self.stream_url = stream_url
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate_limit = rate_limit
+        self._next_request = 0.0
+
+    async def wait_budget(self) -> None:
+        """Выдерживает паузу, чтобы не превысить частоту запросов к провайдеру."""
+        if self.rate_limit <= 0:
+            return
+        now: float = monotonic()
+        request_time: float = max(now, self._next_request)
+        self._next_request = request_time + 1 / self.rate_limit
+        if request_time > now:
+            await asyncio.sleep(request_time - now)
+
+    @abstractmethod
+    def plan(self, pairs: list[tuple[str, str]]) -> list[str]:
+        """Возвращает ключи запросов, необходимых для получения курсов пар."""
+
+    def get_fallback(self, pairs: list[tuple[str, str]], tables: dict[str, dict | None]) -> list[str]:
+        """Возвращает ключи дополнительных запросов для пар, которые не удалось получить по плану."""
+        return []
+
+    def get_url(self, key: str) -> str:
+        """Возвращает адрес запроса для ключа."""
+        return self.url
+
+    @abstractmethod
+    def parse(self, key: str, data) -> dict | None:
+        """Разбирает ответ в таблицу курсов."""
+
+    def learn(self, key: str, table: dict) -> None:
+        """Запоминает содержимое успешно полученной таблицы."""
+
+    def forget(self, pairs: list[tuple[str, str]]) -> None:
+        """Забывает пары, удалённые из списка монет."""
+
+    @abstractmethod
+    def resolve(self, coin: str, currency: str, tables: dict[str, dict | None]) -> float | None:
+        """Вычисляет курс пары из полученных таблиц."""
+
+    def get_subscription(self, pairs: list[tuple[str, str]]) -> list[dict]:
+        """Возвращает сообщения подписки на курсы пар, отправляемые после подключения к потоку."""
+        return []
+
+    def parse_stream(self, data) -> dict:
+        """Разбирает сообщение потока в обновления таблицы курсов."""
+        return {}
+
+    def resolve_stream(self, coin: str, currency: str, table: dict) -> float | None:
+        """Вычисляет курс пары из таблицы потока."""
+        return None
+
+
+class CoinbaseProvider(RateProvider):
+    """Coinbase exchange-rates: один ответ содержит курсы всех валют относительно базовой."""
+    __slots__ = ('planner',)
+
+    def __init__(
+            self, name: str, url: str, concurrency: int = 10, rate_limit: float = 10.0, stream_url: str | None = None
+    ):
+        super().__init__(name, url, concurrency, rate_limit, stream_url)
+        self.planner = RatePlanner()
+
+    def plan(self, pairs: list[tuple[str, str]]) -> list[str]:
+        return self.planner.plan(pairs)
+
+    def get_fallback(self, pairs: list[tuple[str, str]], tables: dict[str, dict | None]) -> list[str]:
+        """
+        Запрашивает пару по её собственной базе, только если запланированный ответ получен, но пары в нём нет,
+        или пара не покрыта планом. Если запланированный запрос не удался, повтор откладывает планировщик опроса.
+        """
+        coins: set[str] = set()
+        for coin, currency in pairs:
+            base: str | None = self.planner.get_base((coin, currency))
+            if coin not in tables and (base is None or tables.get(base) is not None):
+                coins.add(coin)
+        return sorted(coins)
+
+    def get_url(self, key: str) -> str:
+        return f'{self.url}{key}'
+
+    def parse(self, key: str, data) -> dict | None:
+        if isinstance(data, dict) and 'data' in data and 'rates' in data['data']:
+            return data['data']['rates']
+        return None
+
+    def learn(self, key: str, table: dict) -> None:
+        self.planner.learn(key, table)
+
+    def forget(self, pairs: list[tuple[str, str]]) -> None:
+        self.planner.forget(pairs)
+
+    def resolve(self, coin: str, currency: str, tables: dict[str, dict | None]) -> float | None:
+        return self.planner.resolve(coin, currency, tables)
+
+
+class BinanceProvider(RateProvider):
+    """
+    Binance ticker/price: один запрос возвращает последние цены всех торговых пар.
+    Поток !miniTicker@arr раз в секунду присылает цены всех пар, изменившихся за эту секунду.
+    """
+    __slots__ = ()
+    supports_stream: bool = True
+
+    def plan(self, pairs: list[tuple[str, str]]) -> list[str]:
+        return ['ticker'] if pairs else []
+
+    def parse(self, key: str, data) -> dict | None:
+        if not isinstance(data, list):
+            return None
+        return {item['symbol']: item['price'] for item in data if 'symbol' in item and 'price' in item}
+
+    def resolve(self, coin: str, currency: str, tables: dict[str, dict | None]) -> float | None:
+        table: dict | None = tables.get('ticker')
+        if not table:
+            return None
+        try:
+            if f'{coin}{currency}' in table:
+                return float(table[f'{coin}{currency}'])
+            if f'{currency}{coin}' in table:
+                return 1 / float(table[f'{currency}{coin}'])
+        except (TypeError, ValueError, ZeroDivisionError):
+            pass
+        return None
+
+    def parse_stream(self, data) -> dict:
+        items: list = data if isinstance(data, list) else [data]
+        return {item['s']: item['c'] for item in items if isinstance(item, dict) and 's' in item and 'c' in item}
+
+    def resolve_stream(self, coin: str, currency: str, table: dict) -> float | None:
+        return self.resolve(coin, currency, {'ticker': table})
+
+
+PROVIDER_TYPES: dict[str, type[RateProvider]] = {'coinbase': CoinbaseProvider, 'binance': BinanceProvider}
+
+
+def create_providers(settings: dict[str, dict], default_url: str) -> dict[str, RateProvider]:
+    """Создаёт провайдеров по настройкам из конфигурации."""
+    providers: dict[str, RateProvider] = {}
+    for name, options in settings.items():
+        provider_type: str = options.get('type', name)
+        if provider_type not in PROVIDER_TYPES:
+            raise ValueError(f'Неизвестный тип провайдера «{provider_type}» для «{name}»!')
+        url: str | None = options.get('url') or (default_url if provider_type == 'coinbase' else None)
+        if not url:
+            raise ValueError(f'Не указан адрес провайдера «{name}»!')
+        stream_url: str | None = options.get('stream_url') if options.get('stream') else None
+        if stream_url is not None and not PROVIDER_TYPES[provider_type].supports_stream:
+            raise ValueError(f'Провайдер «{name}» не поддерживает потоковые курсы!')
+        providers[name] = PROVIDER_TYPES[provider_type](
+            name, url, options.get('concurrency', 10), options.get('rate_limit', 10.0), stream_url
+        )
+    return providers
@@ -0,0 +1,101 @@
+from time import monotonic
+
+import numpy as np
+
+
+class RateState:
+    """
+    Колоночное хранилище курсов всех пар на массивах NumPy.
+
+    Текущие, предыдущие и начальные курсы хранятся в отдельных массивах, а процентное изменение
+    и направление движения пересчитываются одним векторным проходом за тик.
+    Отсутствующий курс хранится как NaN, changed_at хранит время последнего изменения курса по monotonic,
+    а received_at — время последнего успешного получения курса, даже если он не изменился.
+    """
+    __slots__ = (
+        'current', 'previous', 'start', 'change', 'direction', 'changed', 'changed_at', 'received_at', 'formatted',
+        'labels'
+    )
+    colors: tuple[str, str, str] = ('RED', 'YELLOW', 'GREEN')
+
+    def __init__(self, size: int):
+        self.current = np.full(size, np.nan)
+        self.previous = np.full(size, np.nan)
+        self.start = np.full(size, np.nan)
+        self.change = np.full(size, np.nan)
+        self.direction = np.zeros(size, dtype=np.int8)
+        self.changed = np.zeros(size, dtype=bool)
+        self.changed_at = np.full(size, monotonic())
+        self.received_at = self.changed_at.copy()
+        self.formatted = np.zeros(size, dtype=bool)
+        self.labels: list[tuple | None] = [None] * size
+
+    def __len__(self) -> int:
+        return len(self.current)
+
+    @staticmethod
+    def to_array(rates) -> np.ndarray:
+        """Преобразует последовательность курсов в массив, заменяя отсутствующие и нулевые значения на NaN."""
+        values = np.fromiter((np.nan if rate is None else rate for rate in rates), dtype=float, count=len(rates))
+        values[values == 0] = np.nan
+        return values
+
+    def set_start(self, rates) -> None:
+        """Устанавливает начальные курсы, относительно которых считается процентное изменение, и пересчитывает его."""
+        self.start = self.to_array(rates)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.change = (self.current - self.start) / np.abs(self.start) * 100
+        self.formatted[:] = False
+
+    def take(self, indexes: np.ndarray) -> 'RateState':
+        """
+        Возвращает состояние из строк с указанными индексами в новом порядке.
+        Строки с индексом -1 создаются пустыми, остальные переносятся вместе с готовыми надписями.
+        """
+        state = RateState(len(indexes))
+        kept: np.ndarray = indexes >= 0
+        for name in (
+                'current', 'previous', 'start', 'change', 'direction', 'changed', 'changed_at', 'received_at',
+                'formatted'
+        ):
+            getattr(state, name)[kept] = getattr(self, name)[indexes[kept]]
+        state.labels = [None if index < 0 else self.labels[index] for index in indexes]
+        return state
+
+    def mark_received(self, indexes, times: np.ndarray | float) -> None:
+        """Запоминает время получения курсов пар по индексам, не заменяя более позднее время более ранним."""
+        self.received_at[indexes] = np.maximum(self.received_at[indexes], times)
+
+    def update(self, rates) -> int:
+        """
+        Принимает курсы очередного тика и векторно пересчитывает изменение, направление и отметки перерисовки.
+        Возвращает количество начальных курсов, впервые заполненных текущими значениями.
+        """
+        current: np.ndarray = self.to_array(rates)
+        missing_start: np.ndarray = np.isnan(self.start) & ~np.isnan(current)
+        filled: int = int(np.count_nonzero(missing_start))
+        if filled:
+            self.start[missing_start] = current[missing_start]
+
+        self.previous, self.current = self.current, current
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.change = (current - self.start) / np.abs(self.start) * 100
+            direction: np.ndarray = np.sign(current - self.previous)
+            fallback: np.ndarray = np.sign(current - self.start)
+        direction = np.where(np.isnan(direction) | (direction == 0), fallback, direction)
+        direction = np.where(np.isnan(current), -1, np.nan_to_num(direction))
+
+        same: np.ndarray = (current == self.previous) | (np.isnan(current) & np.isnan(self.previous))
+        self.changed = ~same
+        self.changed_at[self.changed & ~np.isnan(current)] = monotonic()
+        self.formatted &= same & ~missing_start
+        self.direction = direction.astype(np.int8)
+        return filled
+
+    def get_color(self, index: int) -> str:
+        """Возвращает цвет пары по направлению движения курса."""
+        return self.colors[self.direction[index] + 1]
+
+    def get_start_rates(self) -> list[float]:
+        """Возвращает начальные курсы для сохранения, заменяя отсутствующие значения нулём."""
+        return np.nan_to_num(self.start).tolist()
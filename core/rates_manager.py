@@ -1,37 +1,141 @@
 import os
+import shlex
 import asyncio
-import aiohttp
+from collections import deque
+from json import dumps
+from math import isnan
+from time import time, monotonic, perf_counter
 
-from .visualisation import error, Visualisation
+import numpy as np
+
+from .alerts import AlertEngine
+from .broker import RateSubscriber
+from .history import TickHistory
+from .lazy import LazyModule
+from .profiler import Profiler
+from .providers import CoinbaseProvider, RateProvider, create_providers
+from .rate_state import RateState
+from .scheduler import PollingScheduler
+from .stream import RateStream
+from .visualisation import curses, Visualisation
+from .watcher import FileWatcher
+
+aiohttp = LazyModule('aiohttp')
 
 
 class Connection(Visualisation):
+    __slots__ = (
+        'session', 'connection_stats', 'fetch_latencies', 'scheduler', 'rate_providers', 'request_budget', 'profiler',
+        'pool_limit', 'pool_limit_per_host', 'keepalive_timeout', 'request_timeout'
+    )
 
-    @staticmethod
-    def _verify_data(data: dict, currency: str) -> float | None:
-        """Проверяет наличие данных и возвращает курс валюты, если он доступен."""
-        if 'data' in data and 'rates' in data['data']:
-            return data['data']['rates'].get(currency)
-        return None
+    def __init__(self):
+        super().__init__()
+        self.session = None
+        self.connection_stats = {'requests': 0, 'handshakes': 0, 'reused': 0, 'errors': 0}
+        self.fetch_latencies: dict[str, float] = {}
+        self.scheduler = PollingScheduler(
+            self.polling['min_interval'], self.polling['max_interval'], self.polling['max_backoff']
+        )
+        self.rate_providers: dict[str, RateProvider] = create_providers(self.providers, self.api)
+        self.request_budget = asyncio.Semaphore(self.polling['max_concurrency'])
+        self.profiler = Profiler(self.profiling['enabled'], self.profiling['window'], self.profiling['dump_interval'])
+        self.pool_limit = 100
+        self.pool_limit_per_host = 10
+        self.keepalive_timeout = 30
+        self.request_timeout = 5
 
-    async def get_connection(self, coin: str, currency: str) -> dict | None:
-        """Получает данные о курсе указанной криптовалюты в заданной валюте."""
-        try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
-                async with session.get(f'{self.api}{coin}') as response:
-                    response.raise_for_status()
-                    return self._verify_data(await response.json(), currency)
-        except (aiohttp.ClientError, asyncio.TimeoutError):
+    def _create_trace_config(self) -> 'aiohttp.TraceConfig':
+        """Создаёт трассировку сессии для подсчёта запросов, новых и повторно используемых соединений."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(_session, _context, _params) -> None:
+            self.connection_stats['requests'] += 1
+
+        async def on_connection_create_end(_session, _context, _params) -> None:
+            self.connection_stats['handshakes'] += 1
+
+        async def on_connection_reuseconn(_session, _context, _params) -> None:
+            self.connection_stats['reused'] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def open_session(self) -> 'aiohttp.ClientSession':
+        """Открывает общую сессию с пулом keep-alive соединений, если она ещё не открыта."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit, limit_per_host=self.pool_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                trace_configs=[self._create_trace_config()]
+            )
+        return self.session
+
+    async def close_session(self) -> None:
+        """Закрывает общую сессию и логирует статистику использования пула соединений."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+            self.logger.info(
+                'Сессия закрыта. Запросов: %d, новых соединений: %d, повторно использовано: %d',
+                self.connection_stats['requests'], self.connection_stats['handshakes'],
+                self.connection_stats['reused']
+            )
+        self.session = None
+
+    async def get_rates(self, key: str, provider: str = 'coinbase') -> dict | None:
+        """
+        Получает таблицу курсов провайдера по ключу запроса (для Coinbase — базовая валюта).
+        Запрос выполняется в пределах общего лимита одновременных запросов и лимитов провайдера.
+        """
+        source: RateProvider = self.rate_providers[provider]
+        request_key: str = f'{provider}:{key}'
+        if self.scheduler.is_blocked(request_key, provider):
             return None
-        except Exception as e:
-            print(f'Возникла непредвиденная ошибка: {e}')
+        async with self.request_budget, source.semaphore:
+            await source.wait_budget()
+            started: float = perf_counter()
+            try:
+                session = await self.open_session()
+                async with session.get(source.get_url(key)) as response:
+                    response.raise_for_status()
+                    rates: dict | None = source.parse(key, await response.json())
+                self.scheduler.succeed(request_key, provider)
+                if rates is not None:
+                    source.learn(key, rates)
+                return rates
+            except aiohttp.ClientResponseError as e:
+                self.connection_stats['errors'] += 1
+                retry_after: float | None = None
+                if e.status == 429 and e.headers is not None:
+                    retry_after = self.scheduler.get_retry_after(e.headers.get('Retry-After'))
+                if e.status == 429:
+                    delay: float = self.scheduler.fail(provider, retry_after)
+                    self.logger.warning('Превышен лимит запросов к %s (%s), повтор через %.1f с', provider, key, delay)
+                else:
+                    self.scheduler.fail(request_key)
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.connection_stats['errors'] += 1
+                self.scheduler.fail(request_key)
+                return None
+            except Exception as e:
+                self.connection_stats['errors'] += 1
+                print(f'Возникла непредвиденная ошибка: {e}')
+            finally:
+                self.fetch_latencies[request_key] = perf_counter() - started
+                self.profiler.record('request', self.fetch_latencies[request_key])
         return None
 
 
 class FormatColumn(Connection):
     __slots__ = (
         'max_coins_length', 'max_coins_zero', 'max_percent_zero', 'max_percent_length',
-        'x_percentage', 'zero_value', 'start_rates', 'previous_rates', 'initial_rates'
+        'x_percentage', 'zero_value', 'rate_state', 'initial_rates', 'histories', 'sparkline_length'
     )
 
     def __init__(self):
@@ -42,9 +146,10 @@ class FormatColumn(Connection):
         self.max_percent_length = 7
         self.x_percentage = 4
         self.zero_value = f'0.{"0" * (self.max_coins_zero - 1)}'
-        self.start_rates = []
-        self.previous_rates = []
+        self.rate_state = RateState(0)
         self.initial_rates = False
+        self.histories: list[TickHistory] = []
+        self.sparkline_length = self.history['sparkline_length'] if self.history['enabled'] else 0
 
     @staticmethod
     def _verify_name_length(name: str, max_length: int) -> str:
@@ -86,101 +191,660 @@ class FormatColumn(Connection):
         else:
             return rate[:self.max_coins_length]
 
-    def _get_color(self, index: int, current: float, previous: float) -> str:
-        """Определяет цвет в зависимости от текущего и предыдущего значений."""
-        start: float = self.start_rates[index]
-        if current > previous:
-            return 'GREEN'
-        elif current < previous:
-            return 'RED'
-        else:
-            if current > start:
-                return 'GREEN'
-            elif current < start:
-                return 'RED'
-            return 'YELLOW'
+    @staticmethod
+    def _get_sparkline(prices: list[float]) -> str:
+        """Строит мини-график из последних курсов."""
+        blocks: str = '▁▂▃▄▅▆▇█'
+        if not prices:
+            return ''
+        low, high = min(prices), max(prices)
+        if high == low:
+            return blocks[0] * len(prices)
+        return ''.join(blocks[int((price - low) / (high - low) * (len(blocks) - 1))] for price in prices)
 
-    def _get_percentage_difference(self, start_value: float, final_value: float) -> str:
-        """Вычисляет процентное изменение между начальным и конечным значениями."""
-        difference: float = (final_value - start_value) / abs(start_value) * 100
-        formatted_difference: str = f'{difference:.{self.max_percent_zero}f}%'
-        return formatted_difference
+    def _get_labels(self, index: int, coin: str, currency: str) -> tuple[str, str | None, float, str]:
+        """Возвращает строки курса, процента и мини-графика пары, форматируя их заново только после изменения курса."""
+        state: RateState = self.rate_state
+        if not state.formatted[index]:
+            rate: float = state.current[index]
+            sparkline: str = ''
+            if self.sparkline_length and index < len(self.histories):
+                sparkline = self._get_sparkline(self.histories[index].tail(self.sparkline_length))
+            if isnan(rate):
+                labels: tuple = (self._verify_rate_length(coin, currency, self.zero_value), None, 0, sparkline)
+            else:
+                rate_text: str = self._verify_rate_length(coin, currency, f'{rate:.{self.max_coins_zero}f}')
+                if isnan(state.change[index]):
+                    labels = (rate_text, None, 0, sparkline)
+                else:
+                    percentage: str = f'{state.change[index]:.{self.max_percent_zero}f}%'
+                    x_percentage: float = self._get_x_negative_percent(self.x_percentage, percentage)
+                    labels = (rate_text, self._format_percentage(percentage), x_percentage, sparkline)
+            state.labels[index] = labels
+            state.formatted[index] = True
+        return state.labels[index]
 
     def display_rates(
             self, stdscr, index: int, y: int, x: int, coin: str,
-            currency: str, rate: str, coin_color: str, currency_color: str
+            currency: str, coin_color: str, currency_color: str
     ) -> None:
         """Отображает курсы валют на экране."""
         try:
             coin_name: str = self._verify_name_length(coin, 5)
             currency_name: str = self._verify_name_length(currency, 4)
+            rate_text, percentage, x_percentage, sparkline = self._get_labels(index, coin, currency)
+            rate_color: int = self.paint(self.rate_state.get_color(index), False)
 
-            stdscr.addstr(index + y, x, coin_name, self.paint(coin_color, False))
-            stdscr.addstr(index + y, len(coin_name) + x, '/', self.paint(self.marks_color, False))
-            stdscr.addstr(index + y, len(coin_name) + (x + 1), currency_name, self.paint(currency_color, False))
-            stdscr.addstr(index + y, len(coin_name + currency_name) + (x + 1), ':', self.paint(self.marks_color, False))
-            stdscr.addstr(
-                index + y, len(coin_name + currency_name) + (x + 3),
-                str(self._verify_rate_length(coin, currency, rate)),
-                self.paint(self._get_color(index, float(rate), self.previous_rates[index]), False)
-            )
-            if rate is not None and rate != self.zero_value:
-                percentage: str = self._get_percentage_difference(self.start_rates[index], float(rate))
-                stdscr.addstr(
-                    index + y,
-                    x + self.max_coins_length * 2 + self._get_x_negative_percent(self.x_percentage, percentage),
-                    self._format_percentage(percentage),
-                    self.paint(self._get_color(index, float(rate), self.previous_rates[index]), False)
-                )
-        except ZeroDivisionError:
-            self.initial_rates = False
-        except error:
+            stdscr.addstr(y, x, coin_name, self.paint(coin_color, False))
+            stdscr.addstr(y, len(coin_name) + x, '/', self.paint(self.marks_color, False))
+            stdscr.addstr(y, len(coin_name) + (x + 1), currency_name, self.paint(currency_color, False))
+            stdscr.addstr(y, len(coin_name + currency_name) + (x + 1), ':', self.paint(self.marks_color, False))
+            stdscr.addstr(y, len(coin_name + currency_name) + (x + 3), rate_text, rate_color)
+            if percentage is not None:
+                stdscr.addstr(y, x + self.max_coins_length * 2 + x_percentage, percentage, rate_color)
+            if sparkline:
+                stdscr.addstr(y, x + self.max_coins_length * 3 + 1, sparkline, rate_color)
+        except curses.error:
             pass
 
 
 class RatesManager(FormatColumn):
+    __slots__ = (
+        'baseline_time', 'pairs', 'tick_duration', 'updated_at', 'socket_path', 'subscriber', 'streams', 'data_event',
+        'alert_engine', 'recent_alerts', 'alert_tasks', 'saved_start_rates', 'config_watcher', 'histories_readonly'
+    )
+    config_path: str = 'config_files/config.json'
+    start_rates_path: str = 'config_files/start_rates.json'
+
+    def __init__(self):
+        super().__init__()
+        self.baseline_time = 0.0
+        self.pairs: list[tuple[str, str, str, str]] = []
+        self.tick_duration = 0.0
+        self.updated_at = 0.0
+        self.socket_path = 'config_files/coinmonitor.sock'
+        self.subscriber: RateSubscriber | None = None
+        self.streams: list[RateStream] = []
+        self.data_event = asyncio.Event()
+        self.alert_engine = AlertEngine(self.alerts['cooldown'])
+        self.recent_alerts: deque[dict] = deque(maxlen=50)
+        self.alert_tasks: set[asyncio.Task] = set()
+        self.saved_start_rates: dict[str, float] = {}
+        self.config_watcher = FileWatcher((self.config_path, self.start_rates_path))
+        self.histories_readonly = False
 
     @staticmethod
-    def _verify_config(coins: dict[str, dict[str, str]], start_rates: str | bool | dict[str, dict[str, str]]) -> None:
-        """Проверяет, совпадает ли количество монет с количеством начальных курсов."""
-        if len(coins) != len(start_rates):
-            raise ValueError('Количество монет не совпадает с количеством начальных курсов!')
-
-    async def create_coins_list(self, coins: dict) -> list:
-        """Создает список монет с их курсами и дополнительной информацией."""
-        pairs_list = await asyncio.gather(
-            *(self.get_connection(coin, currency['currency']) for coin, currency in coins.items())
-        )
-        len_pairs_list: int = len(pairs_list)
-        if len_pairs_list > 75:
-            raise Exception(f'Превышение максимального количества монет: {len_pairs_list}!')
-        return [
-            (
-                coin, currency['currency'], f'{float(rate):.{self.max_coins_zero}f}'
-            if rate is not None else self.zero_value, currency['coin_color'], currency['currency_color']
+    def _get_sources(settings: dict) -> tuple[str, ...]:
+        """Возвращает провайдеров пары: один источник или несколько, из которых берётся первый ответ."""
+        source: str | list[str] = settings.get('provider', 'coinbase')
+        return (source,) if isinstance(source, str) else tuple(source)
+
+    def verify_sources(self, coins: dict) -> None:
+        """Проверяет, что все указанные в монетах провайдеры настроены."""
+        for coin, settings in coins.items():
+            for source in self._get_sources(settings):
+                if source not in self.rate_providers:
+                    raise ValueError(f'Провайдер «{source}» для монеты «{coin}» не настроен!')
+
+    async def _fetch_table(self, provider: RateProvider, key: str) -> tuple[RateProvider, str, dict | None]:
+        """Запрашивает таблицу курсов и возвращает её вместе с провайдером и ключом."""
+        return provider, key, await self.get_rates(key, provider.name)
+
+    async def _resolve_round(
+            self, requests: list[tuple[RateProvider, str]], pending: dict[tuple[str, str], tuple[str, ...]],
+            tables: dict[str, dict[str, dict | None]], rates: dict[tuple[str, str], float]
+    ) -> None:
+        """
+        Параллельно выполняет запросы и вычисляет курсы пар по мере поступления ответов.
+        Как только все пары получены, оставшиеся запросы (проигравшие в гонке провайдеров) отменяются.
+        """
+        tasks: list[asyncio.Task] = [asyncio.create_task(self._fetch_table(*request)) for request in requests]
+        try:
+            for future in asyncio.as_completed(tasks):
+                provider, key, table = await future
+                tables[provider.name][key] = table
+                if table is None:
+                    continue
+                for pair in [pair for pair, sources in pending.items() if provider.name in sources]:
+                    rate: float | None = provider.resolve(*pair, tables[provider.name])
+                    if rate is not None:
+                        rates[pair] = rate
+                        del pending[pair]
+                if not pending:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_pairs_rates(self, pairs: list[tuple[str, str]]) -> list[float | None]:
+        """
+        Получает курсы пар у их провайдеров одновременно и минимальным числом запросов.
+        Пары, которых нет в полученных по плану ответах, запрашиваются повторно у провайдеров,
+        которые это поддерживают; пары из неудавшихся запросов ждут следующего опроса.
+        """
+        with self.profiler.span('fetch'):
+            pending: dict[tuple[str, str], tuple[str, ...]] = {
+                pair: self._get_sources(self.coins.get(pair[0], {})) for pair in pairs
+            }
+            groups: dict[str, list[tuple[str, str]]] = {}
+            for pair, sources in pending.items():
+                for source in sources:
+                    groups.setdefault(source, []).append(pair)
+            saved_calls: dict[str, int] = self._get_saved_calls()
+            tables: dict[str, dict[str, dict | None]] = {name: {} for name in groups}
+            rates: dict[tuple[str, str], float] = {}
+            await self._resolve_round(
+                [
+                    (self.rate_providers[name], key)
+                    for name, group in groups.items() for key in self.rate_providers[name].plan(group)
+                ],
+                pending, tables, rates
             )
-            for (coin, currency), rate in zip(coins.items(), pairs_list)
+            if pending:
+                await self._resolve_round(
+                    [
+                        (self.rate_providers[name], key)
+                        for name, group in groups.items()
+                        for key in self.rate_providers[name].get_fallback(
+                            [pair for pair in group if pair in pending], tables[name]
+                        )
+                    ],
+                    pending, tables, rates
+                )
+            self._log_saved_calls(saved_calls)
+        return [rates.get(pair) for pair in pairs]
+
+    def _get_saved_calls(self) -> dict[str, int]:
+        """Возвращает число сэкономленных запросов для провайдеров с планировщиком."""
+        return {
+            name: provider.planner.saved_calls
+            for name, provider in self.rate_providers.items() if isinstance(provider, CoinbaseProvider)
+        }
+
+    def _log_saved_calls(self, previous: dict[str, int]) -> None:
+        """Логирует план запросов провайдера, если он изменился."""
+        for name, saved_calls in self._get_saved_calls().items():
+            if saved_calls != previous.get(name):
+                planner = self.rate_providers[name].planner
+                self.logger.info(
+                    'План запросов %s: %d вызов(а) вместо %d, сэкономлено: %d',
+                    name, planner.calls, planner.calls + planner.saved_calls, planner.saved_calls
+                )
+
+    @staticmethod
+    def create_pairs_list(coins: dict) -> list[tuple[str, str, str, str]]:
+        """Создает список пар с названиями и цветами для отображения."""
+        return [
+            (coin, currency['currency'], currency['coin_color'], currency['currency_color'])
+            for coin, currency in coins.items()
         ]
 
+    async def _get_subscribed_rates(self) -> list[float | None] | None:
+        """
+        Берёт курсы из рассылки брокера и самостоятельно запрашивает только отсутствующие в ней пары.
+        Курс из рассылки считается полученным в момент последнего сообщения брокера с этой парой.
+        Возвращает None, если список пар изменился во время запросов.
+        """
+        pairs: list[tuple[str, str, str, str]] = self.pairs
+        broker_rates: dict[str, float | None] = self.subscriber.rates
+        received_at: dict[str, float] = self.subscriber.received_at
+        keys: list[str] = [f'{coin}/{currency}' for coin, currency, _, _ in pairs]
+        missing: list[int] = [index for index, key in enumerate(keys) if key not in broker_rates]
+        polled: list[float | None] = []
+        if missing:
+            polled = await self.get_pairs_rates([pairs[index][:2] for index in missing])
+            if pairs is not self.pairs:
+                return None
+        rates: list[float | None] = [broker_rates.get(key) for key in keys]
+        for index, rate in zip(missing, polled):
+            rates[index] = rate
+        if len(self.rate_state) == len(pairs):
+            self.rate_state.mark_received(
+                np.arange(len(keys)), np.array([received_at.get(key, -np.inf) for key in keys])
+            )
+            self._mark_received(missing, RateState.to_array(polled))
+        return rates
+
+    def get_broadcast_rates(self) -> dict[str, float | None]:
+        """Возвращает текущие курсы пар для рассылки подписчикам."""
+        return {
+            f'{coin}/{currency}': None if isnan(rate) else float(rate)
+            for (coin, currency, _, _), rate in zip(self.pairs, self.rate_state.current)
+        }
+
+    def get_received_times(self) -> dict[str, float]:
+        """Возвращает время последнего получения курса каждой пары по monotonic для рассылки подписчикам."""
+        return {
+            f'{coin}/{currency}': float(received_at)
+            for (coin, currency, _, _), received_at in zip(self.pairs, self.rate_state.received_at)
+        }
+
     def get_percentage_difference(self, start_value: float, final_value: float) -> str:
         """Вычисляет процентное изменение между начальным и конечным значениями."""
         difference: float = (final_value - start_value) / abs(start_value) * 100
         formatted_difference: str = f'{difference:.{self.max_percent_zero}f}%'
         return formatted_difference
 
-    def verify_initial_rates(self, rates: list[str]) -> None:
-        """Проверяет и устанавливает начальные курсы валют."""
+    def save_start_rates(self) -> None:
+        """
+        Сохраняет начальные курсы в файл по ключам пар вида "BTC/USDT".
+        Курсы пар, удалённых из списка монет, остаются в файле и снова используются, если пару вернуть.
+        Пока программа подписана на брокера, файл не перезаписывается: его ведёт брокер.
+        """
+        self.saved_start_rates.update({
+            f'{coin}/{currency}': rate
+            for (coin, currency, _, _), rate in zip(self.pairs, self.rate_state.get_start_rates()) if rate
+        })
+        if self.subscriber is not None and self.subscriber.active:
+            return
+        self.save_json_data('config_files', 'start_rates', {"start_rates": self.saved_start_rates})
+        self.config_watcher.mark(self.start_rates_path)
+
+    def load_start_rates(self) -> dict[str, float]:
+        """
+        Читает сохранённые начальные курсы по ключам пар.
+        Файл прежнего формата со списком курсов сопоставляется с парами по порядку, если их количество совпадает.
+        """
+        if not os.path.exists(self.start_rates_path):
+            return {}
+        start_rates: dict | list = self.get_json_data('config_files', 'start_rates').get('start_rates', {})
+        if isinstance(start_rates, list):
+            if len(start_rates) != len(self.pairs):
+                self.logger.warning('Начальные курсы не совпадают по количеству с парами и будут получены заново')
+                return {}
+            start_rates = {f'{coin}/{currency}': rate for (coin, currency, _, _), rate in zip(self.pairs, start_rates)}
+        return {key: float(rate) for key, rate in start_rates.items() if isinstance(rate, (int, float)) and rate}
+
+    def verify_initial_rates(self) -> None:
+        """
+        Устанавливает сохранённые начальные курсы пар.
+        Пары без сохранённого курса получают его с первого полученного курса.
+        """
         if not self.initial_rates:
-            if os.path.exists('config_files/start_rates.json'):
-                start_rates: str | bool = self.get_config_data('start_rates')['start_rates']
-                self._verify_config(self.coins, start_rates)
-                self.start_rates = start_rates
-            else:
-                self.start_rates: list[float] = [float(rate) for _, _, rate, _, _ in rates]
-                self.save_json_data('config_files', 'start_rates', {"start_rates": self.start_rates})
+            self.saved_start_rates = self.load_start_rates()
+            self.rate_state.set_start([
+                self.saved_start_rates.get(f'{coin}/{currency}') for coin, currency, _, _ in self.pairs
+            ])
+            self.save_start_rates()
             self.initial_rates = True
 
-    def verify_previous_rates(self, rates: list[str]) -> None:
-        """Проверяет и обновляет предыдущие курсы, если их количество не совпадает с текущими курсами."""
-        if len(self.previous_rates) != len(rates):
-            self.previous_rates: list[float] = [0.0] * len(rates)
+    def verify_previous_rates(self, rates: list[float | None]) -> None:
+        """Проверяет и пересоздаёт состояние курсов, если количество пар не совпадает с текущими курсами."""
+        if len(self.rate_state) != len(rates):
+            self.rate_state = RateState(len(rates))
+            self.initial_rates = False
+
+    def open_histories(self, pairs: list[tuple[str, str, str, str]]) -> None:
+        """
+        Открывает файлы истории тиков для всех пар, если история включена.
+        Файлы пар, которые уже были в списке, остаются открытыми, а файлы удалённых пар закрываются.
+        Если открыть файл не удалось, уже открытые в этом вызове файлы закрываются, а прежний список не меняется.
+        Пока программа подписана на брокера, файлы открываются только для чтения.
+        """
+        opened: dict[tuple[str, str], TickHistory] = {
+            (coin, currency): history for (coin, currency, _, _), history in zip(self.pairs, self.histories)
+        }
+        histories: list[TickHistory] = []
+        created: list[TickHistory] = []
+        if self.history['enabled']:
+            TickHistory.reserve_files(len(pairs))
+            try:
+                for coin, currency, _, _ in pairs:
+                    history: TickHistory | None = opened.pop((coin, currency), None)
+                    if history is None:
+                        history = TickHistory(
+                            os.path.join('config_files/history', f'{coin}_{currency}.bin'.replace(os.sep, '_')),
+                            self.history['capacity'], self.histories_readonly
+                        )
+                        created.append(history)
+                    histories.append(history)
+            except OSError:
+                for history in created:
+                    history.close()
+                raise
+        for history in opened.values():
+            history.close()
+        self.histories = histories
+
+    def close_histories(self) -> None:
+        """Закрывает файлы истории тиков."""
+        for history in self.histories:
+            history.close()
+        self.histories = []
+
+    def verify_history_mode(self) -> None:
+        """
+        Переоткрывает историю тиков только для чтения при подписке на брокера и для записи после отключения от него,
+        чтобы в файлы истории писал только один процесс.
+        """
+        readonly: bool = self.subscriber is not None and self.subscriber.active
+        if readonly == self.histories_readonly:
+            return
+        self.histories_readonly = readonly
+        self.close_histories()
+        try:
+            self.open_histories(self.pairs)
+        except OSError as e:
+            self.logger.error('История тиков отключена, файлы истории не открываются: %s', e)
+            self.close_histories()
+
+    def record_histories(self) -> None:
+        """Дописывает в историю курсы, изменившиеся за последний тик."""
+        if not self.histories or self.histories_readonly:
+            return
+        timestamp: float = time()
+        for index in self.rate_state.changed.nonzero()[0]:
+            rate: float = self.rate_state.current[index]
+            if not isnan(rate):
+                self.histories[index].append(timestamp, float(rate))
+
+    def verify_baseline(self) -> None:
+        """Раз в минуту пересчитывает начальные курсы по истории, если задано скользящее окно."""
+        window: float = self.history['baseline_window']
+        if not window or not self.histories or monotonic() < self.baseline_time:
+            return
+        target: float = time() - window
+        self.rate_state.set_start([history.find(target) for history in self.histories])
+        self.baseline_time = monotonic() + 60
+
+    def update_rates(self, rates: list[float | None]) -> None:
+        """Обновляет состояние курсов и сохраняет начальные курсы, если они впервые получены."""
+        with self.profiler.span('state'):
+            self.verify_previous_rates(rates)
+            self.verify_initial_rates()
+            self.verify_baseline()
+            if self.rate_state.update(rates) and not self.history['baseline_window']:
+                self.save_start_rates()
+            self.record_histories()
+        with self.profiler.span('alerts'):
+            self.check_alerts()
+        self.data_event.set()
+
+    def compile_alerts(self, pairs: list[tuple[str, str, str, str]]) -> None:
+        """Компилирует правила оповещений для списка пар."""
+        self.alert_engine.compile(self.alerts['rules'], pairs)
+        if self.alert_engine.window_masks and not self.history['enabled']:
+            self.logger.warning('Оповещения об изменении за период (move) требуют включённой истории тиков!')
+
+    def _get_window_rates(self, window: float) -> np.ndarray:
+        """Возвращает курсы пар на начало окна по истории тиков."""
+        if not self.histories:
+            return np.full(len(self.pairs), np.nan)
+        target: float = time() - window
+        return RateState.to_array([history.find(target) for history in self.histories])
+
+    def check_alerts(self) -> None:
+        """Проверяет правила оповещений по текущим курсам и отправляет сработавшие."""
+        if not len(self.alert_engine):
+            return
+        if self.alert_engine.window_masks:
+            self.alert_engine.update_windows(self._get_window_rates)
+        for alert in self.alert_engine.evaluate(self.rate_state):
+            self.send_alert(alert)
+
+    def send_alert(self, alert: dict) -> None:
+        """Записывает оповещение в лог и список последних и передаёт его во внешние обработчики, если они заданы."""
+        self.logger.warning('Оповещение: %s', alert['message'])
+        self.recent_alerts.append(alert)
+        if self.alerts['webhook'] or self.alerts['command']:
+            task: asyncio.Task = asyncio.get_running_loop().create_task(self._deliver_alert(alert))
+            self.alert_tasks.add(task)
+            task.add_done_callback(self.alert_tasks.discard)
+
+    async def _deliver_alert(self, alert: dict) -> None:
+        """
+        Отправляет оповещение POST-запросом в JSON на адрес webhook и запускает команду command.
+        Команда получает оповещение в переменных окружения COINMONITOR_ALERT (JSON) и COINMONITOR_MESSAGE.
+        """
+        if self.alerts['webhook']:
+            try:
+                session = await self.open_session()
+                async with session.post(self.alerts['webhook'], json=alert) as response:
+                    response.raise_for_status()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.logger.error('Не удалось отправить оповещение на %s: %s', self.alerts['webhook'], e)
+        if self.alerts['command']:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *shlex.split(self.alerts['command']),
+                    env={**os.environ, 'COINMONITOR_ALERT': dumps(alert), 'COINMONITOR_MESSAGE': alert['message']}
+                )
+                await process.wait()
+            except OSError as e:
+                self.logger.error('Не удалось выполнить команду оповещения: %s', e)
+
+    def create_streams(self, pairs: list[tuple[str, str, str, str]]) -> None:
+        """
+        Создаёт потоки курсов для провайдеров с WebSocket, которые указаны в настройках пар.
+        Уже созданные потоки не переподключаются, а только получают новый список пар.
+        """
+        created: dict[str, RateStream] = {stream.provider.name: stream for stream in self.streams}
+        self.streams = []
+        for name, provider in self.rate_providers.items():
+            if provider.stream_url is None:
+                continue
+            indexes: list[int] = [
+                index for index, (coin, _, _, _) in enumerate(pairs)
+                if name in self._get_sources(self.coins.get(coin, {}))
+            ]
+            stream: RateStream | None = created.get(name)
+            if stream is not None:
+                stream.pairs, stream.indexes = [pairs[index][:2] for index in indexes], indexes
+                self.streams.append(stream)
+            elif indexes:
+                self.streams.append(RateStream(provider, [pairs[index][:2] for index in indexes], indexes))
+
+    def _get_current_rates(self) -> np.ndarray:
+        """Возвращает копию текущих курсов или пустые курсы, если состояние ещё не соответствует парам."""
+        if len(self.rate_state) != len(self.pairs):
+            return np.full(len(self.pairs), np.nan)
+        return self.rate_state.current.copy()
+
+    def _mark_received(self, indexes: list[int] | np.ndarray, polled: np.ndarray) -> None:
+        """Отмечает время получения курсов пар, для которых курс действительно пришёл, а не остался прежним."""
+        if len(self.rate_state) == len(self.pairs):
+            self.rate_state.mark_received(np.asarray(indexes, dtype=np.intp)[~np.isnan(polled)], monotonic())
+
+    def _apply_rates(self, indexes: list[int] | np.ndarray, polled: np.ndarray) -> bool:
+        """Применяет полученные курсы части пар, сохраняя последние известные курсы остальных."""
+        self._mark_received(indexes, polled)
+        rates: np.ndarray = self._get_current_rates()
+        updated: np.ndarray = np.where(np.isnan(polled), rates[indexes], polled)
+        if np.array_equal(updated, rates[indexes], equal_nan=True) and self.initial_rates:
+            return False
+        rates[indexes] = updated
+        self.update_rates(rates)
+        self.updated_at = time()
+        return True
+
+    def apply_stream(self, stream: RateStream) -> bool:
+        """Применяет курсы из таблицы потока и возвращает True, если они изменились."""
+        return self._apply_rates(stream.indexes, RateState.to_array(stream.resolve()))
+
+    async def resync_stream(self, stream: RateStream) -> None:
+        """
+        Запрашивает курсы пар потока через REST после (пере)подключения,
+        чтобы восполнить изменения, пропущенные за время разрыва.
+        """
+        self.scheduler.succeed(f'{stream.provider.name}:stream')
+        indexes: list[int] = stream.indexes
+        rates: np.ndarray = RateState.to_array(await self.get_pairs_rates(stream.pairs))
+        if stream.indexes is indexes:
+            self._apply_rates(indexes, rates)
+
+    def get_streamed(self) -> np.ndarray:
+        """Возвращает маску пар, курсы которых сейчас приходят по подключённым потокам."""
+        streamed: np.ndarray = np.zeros(len(self.pairs), dtype=bool)
+        for stream in self.streams:
+            if stream.connected:
+                streamed[stream.indexes] = True
+        return streamed
+
+    async def _get_scheduled_rates(self) -> np.ndarray | None:
+        """
+        Опрашивает только пары, которым подошёл срок и которые не получают курсы по потоку,
+        сохраняя последние известные курсы остальных.
+        """
+        now: float = monotonic()
+        self.scheduler.resize(len(self.pairs))
+        due: np.ndarray = self.scheduler.get_due(now)
+        if self.streams:
+            due = due[~self.get_streamed()[due]]
+        if not due.size:
+            return None
+        pairs: list[tuple[str, str, str, str]] = self.pairs
+        previous: np.ndarray = self._get_current_rates()
+        polled: np.ndarray = RateState.to_array(
+            await self.get_pairs_rates([(pairs[index][0], pairs[index][1]) for index in due])
+        )
+        if pairs is not self.pairs:
+            return None
+        self._mark_received(due, polled)
+        self.scheduler.adapt(due, previous[due], polled, monotonic())
+        rates: np.ndarray = self._get_current_rates()
+        rates[due] = np.where(np.isnan(polled), rates[due], polled)
+        return rates
+
+    async def refresh_rates(self) -> bool:
+        """
+        Обновляет курсы от брокера или опросом пар по расписанию и запоминает длительность и время обновления.
+        Возвращает False, если ни одной паре не подошёл срок опроса или список пар изменился во время запросов.
+        """
+        started: float = perf_counter()
+        pairs: list[tuple[str, str, str, str]] = self.pairs
+        if self.subscriber is not None and await self.subscriber.connect() and self.subscriber.connected:
+            rates = await self._get_subscribed_rates()
+        else:
+            rates = await self._get_scheduled_rates()
+        if rates is None or pairs is not self.pairs:
+            return False
+        self.verify_history_mode()
+        self.update_rates(rates)
+        self.tick_duration = perf_counter() - started
+        self.profiler.record('tick', self.tick_duration)
+        self.updated_at = time()
+        return True
+
+    def get_refresh_delay(self) -> float:
+        """Возвращает паузу до следующего обновления курсов."""
+        if self.subscriber is not None and self.subscriber.connected:
+            return self.scheduler.min_interval
+        return self.scheduler.get_delay(monotonic())
+
+    def rebuild_pairs(self, pairs: list[tuple[str, str, str, str]]) -> None:
+        """
+        Перестраивает состояние под изменённый список пар.
+        Оставшиеся пары сохраняют курсы, историю, расписание опроса и состояние оповещений,
+        добавленные получают начальный курс из start_rates.json или с первого тика, а удалённые забываются.
+        """
+        previous: dict[tuple[str, str], int] = {
+            (coin, currency): index for index, (coin, currency, _, _) in enumerate(self.pairs)
+        }
+        indexes: np.ndarray = np.array(
+            [previous.pop((coin, currency), -1) for coin, currency, _, _ in pairs], dtype=np.intp
+        )
+        added: np.ndarray = np.flatnonzero(indexes < 0)
+        if len(self.rate_state) == len(self.pairs):
+            self.rate_state = self.rate_state.take(indexes)
+            for index in added:
+                coin, currency, _, _ = pairs[index]
+                self.rate_state.start[index] = self.saved_start_rates.get(f'{coin}/{currency}', np.nan)
+        else:
+            self.verify_previous_rates(pairs)
+        if len(self.scheduler.next_due) == len(self.pairs):
+            self.scheduler.take(indexes)
+        for provider in self.rate_providers.values():
+            provider.forget(list(previous))
+        try:
+            self.open_histories(pairs)
+        except OSError as e:
+            self.logger.error('История тиков отключена, файлы истории не открываются: %s', e)
+            self.close_histories()
+        self.pairs = pairs
+        self.logger.info('Список пар обновлён: добавлено %d, удалено %d', len(added), len(previous))
+
+    def reload_config(self) -> bool:
+        """
+        Применяет изменения config.json без перезапуска и возвращает True, если они применены.
+        Монеты, цвета, опрос, замеры и оповещения применяются сразу, а API, провайдеры и история —
+        после перезапуска. Если новые настройки содержат ошибку, программа продолжает работать с прежними.
+        """
+        try:
+            variables: dict = self.get_json_data('config_files', 'config')
+            pairs: list[tuple[str, str, str, str]] = self.create_pairs_list(variables['coins'])
+            for color in (variables['marks_color'], *(color for pair in pairs for color in pair[2:])):
+                self._verify_color_name(color)
+            self.verify_sources(variables['coins'])
+            alerts: dict = {**self.config['alerts'], **variables.get('alerts', {})}
+            AlertEngine(alerts['cooldown']).compile(alerts['rules'], pairs)
+        except Exception as e:
+            self.logger.error('Изменения config.json не применены: %s', e)
+            return False
+        previous: dict = {
+            'api': self.api, 'providers': self.providers, 'history': self.history,
+            'polling': self.polling, 'profiling': self.profiling
+        }
+        self.variables = variables
+        self.set_variables(variables)
+        restart: dict[str, str] = {
+            name: key for name, key in (('api', 'API'), ('providers', 'providers'), ('history', 'history'))
+            if getattr(self, name) != previous[name]
+        }
+        if restart:
+            self.logger.warning('Изменения %s вступят в силу после перезапуска', ', '.join(restart.values()))
+            for name in restart:
+                setattr(self, name, previous[name])
+        if self.polling != previous['polling']:
+            self.scheduler.min_interval = self.polling['min_interval']
+            self.scheduler.max_interval = self.polling['max_interval']
+            self.scheduler.max_backoff = self.polling['max_backoff']
+            if self.polling['max_concurrency'] != previous['polling']['max_concurrency']:
+                self.request_budget = asyncio.Semaphore(self.polling['max_concurrency'])
+        if self.profiling != previous['profiling']:
+            visible: bool = self.profiler.visible
+            self.profiler = Profiler(
+                self.profiling['enabled'] or visible, self.profiling['window'], self.profiling['dump_interval']
+            )
+            self.profiler.visible = visible
+        if [pair[:2] for pair in pairs] != [pair[:2] for pair in self.pairs]:
+            self.rebuild_pairs(pairs)
+        else:
+            self.pairs = pairs
+        self.alert_engine.cooldown = self.alerts['cooldown']
+        self.compile_alerts(self.pairs)
+        streamed: set[str] = {stream.provider.name for stream in self.streams}
+        self.create_streams(self.pairs)
+        for stream in self.streams:
+            if stream.provider.name not in streamed:
+                self.logger.warning(
+                    'Поток курсов %s подключится после перезапуска, до этого его пары опрашиваются',
+                    stream.provider.name
+                )
+        self.logger.info('Настройки из config.json применены')
+        return True
+
+    def reload_start_rates(self) -> bool:
+        """Применяет начальные курсы, изменённые в start_rates.json во время работы, и возвращает True при успехе."""
+        try:
+            self.saved_start_rates = self.load_start_rates()
+        except Exception as e:
+            self.logger.error('Изменения start_rates.json не применены: %s', e)
+            return False
+        if not self.initial_rates or len(self.rate_state) != len(self.pairs):
+            return False
+        start: np.ndarray = self.rate_state.start.copy()
+        for index, (coin, currency, _, _) in enumerate(self.pairs):
+            start[index] = self.saved_start_rates.get(f'{coin}/{currency}', start[index])
+        self.rate_state.set_start(start)
+        self.logger.info('Начальные курсы из start_rates.json применены')
+        return True
+
+    def verify_config_files(self) -> bool:
+        """Проверяет, изменились ли config.json и start_rates.json, и применяет изменения."""
+        applied: bool = False
+        for path in self.config_watcher.get_changed():
+            applied |= self.reload_config() if path == self.config_path else self.reload_start_rates()
+        if applied:
+            self.data_event.set()
+        return applied
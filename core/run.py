@@ -1,63 +1,297 @@
+import sys
+import signal
 import asyncio
-from threading import Thread
+from time import time
 
+from .broker import RateBroker, RateSubscriber
+from .exporter import MetricsExporter
+from .layout import Layout
+from .lazy import LazyModule
 from .rates_manager import RatesManager
+from .stream import RateStream
+from .visualisation import curses, FrameBuffer
+
+aiohttp = LazyModule('aiohttp')
 
 
 class RunProgram(RatesManager):
-    __slots__ = ('running',)
+    __slots__ = ('running', 'stop_event', 'frame', 'layout', 'key_bindings')
 
     def __init__(self):
         super().__init__()
         self.running = True
+        self.stop_event = asyncio.Event()
+        self.frame = FrameBuffer()
+        self.layout = Layout(
+            column_width=37 + self.sparkline_length + 1 if self.sparkline_length else 37,
+            min_width=34 + self.sparkline_length + 1 if self.sparkline_length else 34
+        )
+        self.key_bindings: dict = {}
+
+    def get_key_bindings(self) -> dict:
+        """Возвращает действия клавиш управления; коды клавиш берутся из curses, поэтому он импортируется здесь."""
+        return {
+            curses.KEY_UP: lambda: self.layout.scroll(-1), ord('k'): lambda: self.layout.scroll(-1),
+            curses.KEY_DOWN: lambda: self.layout.scroll(1), ord('j'): lambda: self.layout.scroll(1),
+            curses.KEY_LEFT: lambda: self.layout.scroll_columns(-1),
+            curses.KEY_RIGHT: lambda: self.layout.scroll_columns(1),
+            curses.KEY_PPAGE: lambda: self.layout.scroll_pages(-1),
+            curses.KEY_NPAGE: lambda: self.layout.scroll_pages(1),
+            ord(' '): lambda: self.layout.scroll_pages(1),
+            curses.KEY_HOME: lambda: self.layout.scroll_to(0),
+            curses.KEY_END: lambda: self.layout.scroll_to(self.layout.total),
+            ord('p'): self.toggle_profiler, curses.KEY_RESIZE: lambda: None
+        }
+
+    def toggle_profiler(self) -> None:
+        """Показывает или скрывает строку со статистикой замеров и освобождает под неё нижнюю строку экрана."""
+        self.profiler.toggle()
+        self.verify_status_row()
+
+    def verify_status_row(self) -> None:
+        """Отводит нижнюю строку экрана под состояние, если показана статистика или заданы оповещения."""
+        self.layout.status_row = self.profiler.visible or bool(len(self.alert_engine))
+
+    def stop(self, signum: int | None = None) -> None:
+        """Снимает флаг работы и прерывает ожидания и запросы главного цикла."""
+        if signum is not None:
+            self.logger.info('Задействован обработчик сигналов для корректного завершения: %s', signum)
+        self.running = False
+        self.stop_event.set()
+
+    def add_signal_handlers(self) -> None:
+        """
+        Обрабатывает сигналы завершения в цикле asyncio.
+        Где цикл не поддерживает сигналы, обработчик передаёт остановку в цикл из signal.signal.
+        """
+        loop = asyncio.get_running_loop()
+        for name in ('SIGHUP', 'SIGINT', 'SIGTERM'):
+            if not hasattr(signal, name):
+                continue
+            signum: int = getattr(signal, name)
+            try:
+                loop.add_signal_handler(signum, self.stop, signum)
+            except (NotImplementedError, RuntimeError):
+                signal.signal(signum, lambda number, _frame: loop.call_soon_threadsafe(self.stop, number))
+
+    def read_keys(self, stdscr) -> None:
+        """
+        Обрабатывает все ожидающие нажатия клавиш.
+        Клавиши управления сразу перерисовывают экран, любая другая клавиша завершает программу.
+        """
+        while (key := stdscr.getch()) != -1:
+            action = self.key_bindings.get(key)
+            if action is None:
+                self.stop()
+                return
+            action()
+        self.data_event.set()
 
-    def wait_for_enter(self, stdscr) -> None:
-        """Ждёт нажатия клавиши и устанавливает флаг остановки."""
-        stdscr.getch()
-        self.running: bool = False
+    def on_resize(self) -> None:
+        """Перерисовывает экран после изменения размера терминала."""
+        if self.resize_terminal():
+            self.data_event.set()
+
+    async def create_input_loop(self, stdscr) -> None:
+        """
+        Обрабатывает клавиши по мере поступления ввода и изменение размера терминала по сигналу SIGWINCH.
+        Где цикл не умеет следить за stdin, клавиатура опрашивается без блокировки.
+        """
+        stdscr.nodelay(True)
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_reader(sys.stdin.fileno(), self.read_keys, stdscr)
+        except (NotImplementedError, OSError, ValueError):
+            while self.running:
+                self.read_keys(stdscr)
+                await asyncio.sleep(0.05)
+            return
+        resize_signal: int | None = getattr(signal, 'SIGWINCH', None)
+        if resize_signal is not None:
+            loop.add_signal_handler(resize_signal, self.on_resize)
+        try:
+            await self.stop_event.wait()
+        finally:
+            loop.remove_reader(sys.stdin.fileno())
+            if resize_signal is not None:
+                loop.remove_signal_handler(resize_signal)
 
     async def create_main_loop(self, stdscr) -> None:
-        """Запускает все модули программы в цикле."""
+        """
+        Запускает все модули программы в цикле.
+        Отрисовка запускается первой, а сессия HTTP открывается при первом запросе,
+        поэтому первый кадр выводится до импорта aiohttp и установки соединений.
+        """
+        self.add_signal_handlers()
+        self.subscriber = RateSubscriber(self.socket_path)
+        try:
+            self.verify_sources(self.coins)
+            self.pairs = self.create_pairs_list(self.coins)
+            self.verify_previous_rates(self.pairs)
+            await self.subscriber.connect()
+            self.histories_readonly = self.subscriber.active
+            self.open_histories(self.pairs)
+            self.compile_alerts(self.pairs)
+            self.verify_status_row()
+            self.create_streams(self.pairs)
+            await self.run_tasks(
+                self._run_main_loop(stdscr), self.stop_event.wait(), self.create_input_loop(stdscr),
+                self.create_fetch_loop(), self.create_reload_loop(),
+                *(self.create_stream_loop(stream) for stream in self.streams)
+            )
+        finally:
+            await self.subscriber.close()
+            await self.close_session()
+            self.close_histories()
+
+    @staticmethod
+    async def run_tasks(*coroutines) -> None:
+        """
+        Запускает задачи параллельно и после завершения или ошибки любой из них отменяет остальные,
+        прерывая и выполняющиеся запросы, а ошибку пробрасывает.
+        """
+        tasks: list[asyncio.Task] = [asyncio.create_task(coroutine) for coroutine in coroutines]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            task.result()
+
+    async def create_fetch_loop(self, callback=None) -> None:
+        """Обновляет курсы по расписанию независимо от отрисовки и вызывает callback после каждого обновления."""
+        while self.running:
+            if await self.refresh_rates() and callback is not None:
+                callback()
+            self.profiler.dump()
+            await asyncio.sleep(self.get_refresh_delay())
+
+    async def create_reload_loop(self) -> None:
+        """Раз в interval секунд проверяет файлы настроек и применяет их изменения без перезапуска."""
+        while self.running:
+            await asyncio.sleep(self.reload['interval'])
+            if self.reload['enabled'] and self.verify_config_files():
+                self.verify_status_row()
+
+    async def create_stream_loop(self, stream: RateStream, callback=None) -> None:
+        """
+        Получает курсы из потока провайдера и переподключается после разрыва с нарастающей паузой.
+        Пока поток подключён, его пары не опрашиваются, а после каждого подключения курсы сверяются через REST.
+        """
+        key: str = f'{stream.provider.name}:stream'
+
+        async def on_connect() -> None:
+            self.logger.info('Поток курсов %s подключён: %d пар(ы)', stream.provider.name, len(stream.pairs))
+            await self.resync_stream(stream)
+            if callback is not None:
+                callback()
+
+        def on_update() -> None:
+            if self.apply_stream(stream) and callback is not None:
+                callback()
+
         while self.running:
-            stdscr.clear()
-            height, width = stdscr.getmaxyx()
-            rates: list[str] = await self.create_coins_list(self.coins)
-
-            self.verify_initial_rates(rates)
-            self.verify_previous_rates(rates)
-
-            counter_first, counter_second, counter_third = 0, 0, 0
-
-            for i, (coin, currency, rate, coin_color, currency_color) in enumerate(rates):
-                current_rate = float(rate)
-
-                if width >= 34:
-                    if counter_first <= height - 2:
-                        args: tuple = (coin, currency, rate, coin_color, currency_color)
-                        self.display_rates(stdscr, i, 1, 1, *args)
-                        counter_first += 1
-                    else:
-                        if width >= 71:
-                            if counter_second <= height - 2:
-                                args: tuple = (coin, currency, rate, coin_color, currency_color)
-                                self.display_rates(
-                                    stdscr, i, - height + 2, 38, *args)
-                                counter_second += 1
-                            else:
-                                if width >= 108:
-                                    if counter_third <= height - 2:
-                                        args: tuple = (coin, currency, rate, coin_color, currency_color)
-                                        self.display_rates(stdscr, i, - counter_second - height + 2, 75, *args)
-                                    counter_third += 1
-
-                self.previous_rates[i]: list[float] = current_rate
+            if self.subscriber is not None and self.subscriber.connected:
+                await asyncio.sleep(self.scheduler.min_interval)
+                continue
+            try:
+                await stream.listen(await self.open_session(), on_connect, on_update)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                self.logger.warning('Ошибка потока курсов %s: %s', stream.provider.name, e)
+            if not self.running:
+                break
+            delay: float = self.scheduler.fail(key)
+            self.logger.warning('Поток курсов %s прерван, переподключение через %.1f с', stream.provider.name, delay)
+            await asyncio.sleep(delay)
+
+    async def wait_for_data(self, timeout: float) -> None:
+        """Ожидает новых курсов, но не дольше timeout секунд."""
+        try:
+            await asyncio.wait_for(self.data_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.data_event.clear()
+
+    def draw_frame(self, stdscr) -> int:
+        """Собирает кадр по текущему состоянию курсов и выводит на экран его отличия от предыдущего."""
+        with self.profiler.span('draw'):
+            self.frame.resize(stdscr)
+            height, width = self.frame.getmaxyx()
+
+            for i in self.layout.update(height, width, len(self.pairs)):
+                y, x = self.layout.position(i)
+                self.display_rates(self.frame, i, y, x, *self.pairs[i])
+            status: str = self.layout.get_status()
+            if self.profiler.visible:
+                status = f'{status}  {self.profiler.get_status()}  {self.frame.get_status()}'.strip()
+            if self.recent_alerts and time() - self.recent_alerts[-1]['time'] < 60:
+                status = f'{status}  ! {self.recent_alerts[-1]["message"]}'.strip()
+            if status:
+                self.frame.addstr(height - 1, 1, status[:max(0, width - 2)], self.paint(self.marks_color, False))
 
             if self.running:
-                stdscr.refresh()
-            await asyncio.sleep(0.5)
-
-    def create_wrapped_threads(self) -> None:
-        """Запускает главный цикл и поток ожидания нажатия клавиши."""
-        self.safe_wrapper(self.init_curses, None)
-        Thread(target=self.safe_wrapper, args=(self.wait_for_enter, None)).start()
-        self.safe_wrapper(lambda stdscr: asyncio.run(self.create_main_loop(stdscr)))
+                return self.frame.render(stdscr)
+            return 0
+
+    async def _run_main_loop(self, stdscr) -> None:
+        """Перерисовывает экран при поступлении курсов или раз в полсекунды, пока установлен флаг работы."""
+        while self.running:
+            self.draw_frame(stdscr)
+            await self.wait_for_data(0.5)
+
+    async def create_headless_loop(self, host: str | None, port: int, broadcast: bool) -> None:
+        """
+        Запускает цикл обновления курсов без curses.
+        Курсы публикуются через HTTP, если указан адрес, и рассылаются через Unix-сокет в режиме брокера.
+        """
+        self.add_signal_handlers()
+        exporter = MetricsExporter(self) if host else None
+        broker = RateBroker(self.socket_path) if broadcast else None
+        try:
+            self.verify_sources(self.coins)
+            self.pairs = self.create_pairs_list(self.coins)
+            self.open_histories(self.pairs)
+            self.compile_alerts(self.pairs)
+            self.create_streams(self.pairs)
+            await self.open_session()
+            if exporter is not None:
+                await exporter.start(host, port)
+                self.logger.info('Метрики доступны по адресу http://%s:%d (/metrics, /rates)', host, port)
+            if broker is not None:
+                await broker.start()
+                self.logger.info('Брокер курсов запущен: %s', self.socket_path)
+
+            def publish() -> None:
+                broker.publish(self.get_broadcast_rates(), self.updated_at, self.get_received_times())
+
+            callback = None if broker is None else publish
+            await self.run_tasks(
+                self.stop_event.wait(), self.create_fetch_loop(callback), self.create_reload_loop(),
+                *(self.create_stream_loop(stream, callback) for stream in self.streams)
+            )
+        finally:
+            if exporter is not None:
+                await exporter.stop()
+            if broker is not None:
+                await broker.stop()
+            await self.close_session()
+            self.close_histories()
+
+    def create_headless(self, host: str | None, port: int, broadcast: bool = False) -> None:
+        """Запускает фоновый режим без интерфейса до снятия флага работы."""
+        asyncio.run(self.create_headless_loop(host, port, broadcast))
+
+    def create_curses_loop(self, stdscr) -> None:
+        """Инициализирует экран и запускает главный цикл в том же потоке."""
+        self.init_curses(stdscr)
+        self.key_bindings = self.get_key_bindings()
+        asyncio.run(self.create_main_loop(stdscr))
+
+    def create_wrapped_loop(self) -> None:
+        """Запускает интерфейс curses до нажатия клавиши выхода или сигнала завершения."""
+        if not curses.is_available():
+            raise ModuleNotFoundError('Для работы программы необходимо установить модуль curses!')
+        self.verify_config_colors()
+        self.safe_wrapper(self.create_curses_loop)
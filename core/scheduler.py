@@ -0,0 +1,112 @@
+from email.utils import parsedate_to_datetime
+from time import time, monotonic
+
+import numpy as np
+
+
+class PollingScheduler:
+    """
+    Планировщик опроса с собственным интервалом для каждой пары.
+
+    Интервал пары сокращается вдвое, когда её курс меняется, и растёт в полтора раза, когда курс стоит на месте.
+    После ошибки пара и запрос откладываются экспоненциально со случайным разбросом,
+    а ответ 429 откладывает все запросы к провайдеру, с заголовком Retry-After — на указанное сервером время.
+    """
+    __slots__ = (
+        'min_interval', 'max_interval', 'max_backoff', 'next_due', 'intervals', 'failures',
+        'base_failures', 'blocked_until'
+    )
+
+    def __init__(self, min_interval: float = 0.5, max_interval: float = 30.0, max_backoff: float = 60.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_backoff = max_backoff
+        self.next_due = np.zeros(0)
+        self.intervals = np.zeros(0)
+        self.failures = np.zeros(0, dtype=np.int32)
+        self.base_failures: dict[str, int] = {}
+        self.blocked_until: dict[str, float] = {}
+
+    def resize(self, size: int) -> None:
+        """Сбрасывает расписание, если изменилось количество пар."""
+        if len(self.next_due) != size:
+            self.next_due = np.zeros(size)
+            self.intervals = np.full(size, self.min_interval)
+            self.failures = np.zeros(size, dtype=np.int32)
+
+    def take(self, indexes: np.ndarray) -> None:
+        """Переупорядочивает расписание по индексам прежних пар; новые пары (индекс -1) опрашиваются сразу."""
+        kept: np.ndarray = indexes >= 0
+        next_due: np.ndarray = np.zeros(len(indexes))
+        intervals: np.ndarray = np.full(len(indexes), self.min_interval)
+        failures: np.ndarray = np.zeros(len(indexes), dtype=np.int32)
+        if len(self.next_due):
+            next_due[kept] = self.next_due[indexes[kept]]
+            intervals[kept] = self.intervals[indexes[kept]]
+            failures[kept] = self.failures[indexes[kept]]
+        self.next_due, self.intervals, self.failures = next_due, intervals, failures
+
+    def _get_backoff(self, failures: np.ndarray | int) -> np.ndarray | float:
+        """Вычисляет экспоненциальную отсрочку со случайным разбросом от половины до полного значения."""
+        delay = np.minimum(self.max_backoff, self.min_interval * np.power(2.0, np.minimum(failures, 16)))
+        return delay * np.random.uniform(0.5, 1.0, np.shape(delay))
+
+    def get_due(self, now: float) -> np.ndarray:
+        """Возвращает индексы пар, которые пора опросить."""
+        return np.flatnonzero(self.next_due <= now)
+
+    def get_delay(self, now: float) -> float:
+        """Возвращает время до ближайшего опроса, но не больше минимального интервала."""
+        if not len(self.next_due):
+            return self.min_interval
+        return float(np.clip(self.next_due.min() - now, 0.05, self.min_interval))
+
+    def adapt(self, indexes: np.ndarray, previous: np.ndarray, current: np.ndarray, now: float) -> None:
+        """Пересчитывает интервалы опрошенных пар по изменению курса и откладывает не полученные."""
+        failed: np.ndarray = np.isnan(current)
+        moved: np.ndarray = ~failed & (current != previous)
+        self.intervals[indexes] = np.where(
+            moved,
+            np.maximum(self.min_interval, self.intervals[indexes] / 2),
+            np.minimum(self.max_interval, self.intervals[indexes] * 1.5)
+        )
+        self.failures[indexes] = np.where(failed, self.failures[indexes] + 1, 0)
+        self.next_due[indexes] = now + np.where(
+            failed, self._get_backoff(self.failures[indexes]), self.intervals[indexes]
+        )
+
+    def is_blocked(self, key: str, group: str = '*') -> bool:
+        """Проверяет, отложен ли запрос по ключу или все запросы его группы."""
+        now: float = monotonic()
+        return self.blocked_until.get(key, 0.0) > now or self.blocked_until.get(group, 0.0) > now
+
+    @staticmethod
+    def get_retry_after(value: str | None) -> float | None:
+        """Разбирает заголовок Retry-After в секундах или в виде HTTP-даты."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+        except (TypeError, ValueError):
+            return None
+
+    def fail(self, key: str, retry_after: float | None = None) -> float:
+        """
+        Откладывает запрос по ключу после ошибки и возвращает длительность отсрочки.
+        Ключом может быть и группа, например провайдер, тогда откладываются все её запросы.
+        """
+        failures: int = self.base_failures.get(key, 0) + 1
+        self.base_failures[key] = failures
+        delay: float = retry_after if retry_after is not None else float(self._get_backoff(failures))
+        self.blocked_until[key] = monotonic() + delay
+        return delay
+
+    def succeed(self, key: str, group: str = '*') -> None:
+        """Снимает отсрочку с запроса и его группы после успешного ответа."""
+        for name in (key, group):
+            self.base_failures.pop(name, None)
+            self.blocked_until.pop(name, None)
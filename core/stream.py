@@ -0,0 +1,55 @@
+from json import loads
+
+from .lazy import LazyModule
+from .providers import RateProvider
+
+aiohttp = LazyModule('aiohttp')
+
+
+class RateStream:
+    """
+    Постоянное WebSocket-подключение к потоку курсов провайдера.
+
+    Поток держит собственную таблицу курсов в формате провайдера и дополняет её каждым сообщением,
+    а курсы пар вычисляются из таблицы так же, как из ответов REST.
+    """
+    __slots__ = ('provider', 'pairs', 'indexes', 'table', 'connected', 'messages', 'heartbeat')
+
+    def __init__(
+            self, provider: RateProvider, pairs: list[tuple[str, str]], indexes: list[int], heartbeat: float = 30.0
+    ):
+        self.provider = provider
+        self.pairs = pairs
+        self.indexes = indexes
+        self.table: dict = {}
+        self.connected = False
+        self.messages = 0
+        self.heartbeat = heartbeat
+
+    def resolve(self) -> list[float | None]:
+        """Вычисляет курсы пар потока из текущей таблицы."""
+        return [self.provider.resolve_stream(coin, currency, self.table) for coin, currency in self.pairs]
+
+    async def listen(self, session: 'aiohttp.ClientSession', on_connect, on_update) -> None:
+        """
+        Держит одно подключение: подписывается на пары, ожидает on_connect и вызывает on_update
+        после каждого сообщения с курсами, пока сервер не закроет соединение.
+        """
+        async with session.ws_connect(self.provider.stream_url, heartbeat=self.heartbeat) as websocket:
+            for message in self.provider.get_subscription(self.pairs):
+                await websocket.send_json(message)
+            self.connected = True
+            try:
+                await on_connect()
+                async for message in websocket:
+                    if message.type == aiohttp.WSMsgType.ERROR:
+                        break
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        continue
+                    updates: dict = self.provider.parse_stream(loads(message.data))
+                    if updates:
+                        self.table.update(updates)
+                        self.messages += 1
+                        on_update()
+            finally:
+                self.connected = False
@@ -1,58 +1,173 @@
-try:
-    from curses import (
-        wrapper, error, curs_set, baudrate, start_color, init_pair, use_default_colors, has_colors, color_pair,
-        A_BOLD, COLOR_BLACK, COLOR_BLUE, COLOR_CYAN, COLOR_GREEN, COLOR_MAGENTA, COLOR_RED, COLOR_WHITE, COLOR_YELLOW
-    )
-except ModuleNotFoundError:
-    print('\nДля работы программы необходимо установить модуль curses!\n')
+import os
+import sys
 
 from .base import Base
+from .lazy import LazyModule
+
+curses = LazyModule('curses')
 
 
 class Visualisation(Base):
+    __slots__ = ('attributes',)
+    colors: tuple[str, ...] = ('MAGENTA', 'BLUE', 'CYAN', 'GREEN', 'YELLOW', 'RED', 'WHITE', 'BLACK')
+
+    def __init__(self):
+        super().__init__()
+        self.attributes: dict[tuple[str, bool], int] = {}
 
     @staticmethod
     def safe_wrapper(function, *args) -> None:
         """Оборачивает вызов wrapper в try/except и подавляет исключения curses.error."""
         try:
             if any(args):
-                wrapper(function, *args)
+                curses.wrapper(function, *args)
             else:
-                wrapper(function)
-        except error:
+                curses.wrapper(function)
+        except curses.error:
             pass
 
     @staticmethod
     def verify_color(color: str) -> int:
         """Метод проверяет настройку цвета из конфигурации."""
         color_map: dict[str, int] = {
-            'BLACK': COLOR_BLACK, 'BLUE': COLOR_BLUE, 'CYAN': COLOR_CYAN, 'GREEN': COLOR_GREEN,
-            'MAGENTA': COLOR_MAGENTA, 'RED': COLOR_RED, 'WHITE': COLOR_WHITE, 'YELLOW': COLOR_YELLOW,
+            'BLACK': curses.COLOR_BLACK, 'BLUE': curses.COLOR_BLUE, 'CYAN': curses.COLOR_CYAN,
+            'GREEN': curses.COLOR_GREEN, 'MAGENTA': curses.COLOR_MAGENTA, 'RED': curses.COLOR_RED,
+            'WHITE': curses.COLOR_WHITE, 'YELLOW': curses.COLOR_YELLOW,
         }
-        return color_map.get(color.upper(), COLOR_WHITE)
+        return color_map.get(color.upper(), curses.COLOR_WHITE)
 
-    @staticmethod
-    def init_curses(stdscr) -> None:
+    def _verify_color_name(self, color: str) -> str:
+        """Проверяет, что цвет доступен, и возвращает его имя в верхнем регистре."""
+        try:
+            color_name: str = color.upper()
+        except AttributeError:
+            color_name = ''
+        if color_name not in self.colors:
+            error_message = f'Цвет "{color}" не найден в доступных цветах.'
+            self.logger.error('%s (доступные: %s)', error_message, ', '.join(self.colors))
+            raise KeyError(error_message)
+        return color_name
+
+    def verify_config_colors(self) -> None:
+        """Проверяет все цвета из конфигурации до запуска интерфейса."""
+        self._verify_color_name(self.marks_color)
+        for settings in self.coins.values():
+            self._verify_color_name(settings['coin_color'])
+            self._verify_color_name(settings['currency_color'])
+
+    def init_colors(self) -> None:
+        """Один раз создаёт цветовые пары и таблицу атрибутов для всех цветов из конфигурации."""
+        for i, color in enumerate(self.colors, 1):
+            curses.init_pair(i, self.verify_color(color), -1)
+            self.attributes[(color, False)] = curses.color_pair(i)
+            self.attributes[(color, True)] = curses.color_pair(i) | curses.A_BOLD
+        config_colors: set[str] = {self.marks_color}
+        for settings in self.coins.values():
+            config_colors.update((settings['coin_color'], settings['currency_color']))
+        for color in config_colors:
+            for a_bold in (False, True):
+                self.attributes[(color, a_bold)] = self.attributes[(self._verify_color_name(color), a_bold)]
+
+    def init_curses(self, stdscr) -> None:
         """Инициализирует экран curses"""
         stdscr.clear()
         stdscr.refresh()
-        curs_set(0)
-        if has_colors():
-            use_default_colors()
-            start_color()
+        curses.curs_set(0)
+        if curses.has_colors():
+            curses.use_default_colors()
+            curses.start_color()
+        self.init_colors()
+
+    @staticmethod
+    def resize_terminal() -> bool:
+        """Подстраивает curses под новый размер терминала и возвращает True, если размер изменился."""
+        try:
+            columns, lines = os.get_terminal_size(sys.__stdout__.fileno())
+        except (OSError, ValueError):
+            return False
+        if not curses.is_term_resized(lines, columns):
+            return False
+        curses.resizeterm(lines, columns)
+        return True
 
     def paint(self, color: str, a_bold: bool) -> int:
         """Раскрашивает текст или текстовое изображение."""
-        colors = ('MAGENTA', 'BLUE', 'CYAN', 'GREEN', 'YELLOW', 'RED', 'WHITE', 'BLACK')
-        for i in range(1, len(colors) + 1):
-            init_pair(i, self.verify_color(colors[i - 1]), -1)
         try:
-            pair_index = colors.index((color or '').upper()) + 1
-        except (ValueError, AttributeError):
-            error_message = f'Цвет "{color}" не найден в доступных цветах.'
-            self.logger.error('%s (доступные: %s)', error_message, ', '.join(colors))
-            raise KeyError(error_message)
-        attribute = color_pair(pair_index)
-        if a_bold:
-            attribute |= A_BOLD
-        return attribute
+            return self.attributes[(color, a_bold)]
+        except (KeyError, TypeError):
+            return self.attributes.get((self._verify_color_name(color), a_bold), 0)
+
+
+class FrameBuffer:
+    """
+    Буфер кадра, перерисовывающий только изменившиеся фрагменты экрана.
+
+    Повторяет интерфейс addstr/getmaxyx окна curses, поэтому в него можно рисовать так же, как в stdscr.
+    Полная перерисовка выполняется только при изменении размера терминала.
+    Вместо curses.doupdate можно передать другую функцию обновления экрана, например для замеров без терминала.
+    """
+    __slots__ = ('previous', 'current', 'size', 'cells_written', 'full_redraws', 'update')
+
+    def __init__(self, update=None):
+        self.update = update
+        self.previous: dict[tuple[int, int], tuple[str, int]] = {}
+        self.current: dict[tuple[int, int], tuple[str, int]] = {}
+        self.size: tuple[int, int] = (0, 0)
+        self.cells_written = 0
+        self.full_redraws = 0
+
+    def getmaxyx(self) -> tuple[int, int]:
+        """Возвращает размер экрана, для которого собирается текущий кадр."""
+        return self.size
+
+    def addstr(self, y: int, x: int, text: str, attribute: int = 0) -> None:
+        """Запоминает фрагмент текста нового кадра."""
+        self.current[(y, x)] = (text, attribute)
+
+    def get_status(self) -> str:
+        """Возвращает число ячеек, выведенных в последнем кадре, и количество полных перерисовок."""
+        return f'кадр {self.cells_written} яч., полных перерисовок {self.full_redraws}'
+
+    def resize(self, stdscr) -> bool:
+        """Сверяет размер кадра с терминалом и при изменении сбрасывает предыдущий кадр."""
+        size: tuple[int, int] = stdscr.getmaxyx()
+        if size == self.size:
+            return False
+        self.size = size
+        self.previous = {}
+        self.full_redraws += 1
+        stdscr.clear()
+        return True
+
+    @staticmethod
+    def _write(stdscr, y: int, x: int, text: str, attribute: int) -> int:
+        """Выводит фрагмент на экран и возвращает число записанных ячеек."""
+        try:
+            stdscr.addstr(y, x, text, attribute)
+        except curses.error:
+            pass
+        return len(text)
+
+    def render(self, stdscr) -> int:
+        """
+        Выводит отличия нового кадра от предыдущего одним обновлением терминала.
+        Исчезнувшие и укоротившиеся фрагменты стираются пробелами, а их строки выводятся заново целиком.
+        """
+        cells: int = 0
+        dirty_rows: set[int] = set()
+        for (y, x), (text, _) in self.previous.items():
+            current: tuple[str, int] | None = self.current.get((y, x))
+            if current is None or len(current[0]) < len(text):
+                cells += self._write(stdscr, y, x, ' ' * len(text), 0)
+                dirty_rows.add(y)
+        for (y, x), value in self.current.items():
+            if y in dirty_rows or self.previous.get((y, x)) != value:
+                cells += self._write(stdscr, y, x, *value)
+        stdscr.noutrefresh()
+        if self.update is None:
+            curses.doupdate()
+        else:
+            self.update()
+        self.previous, self.current = self.current, {}
+        self.cells_written = cells
+        return cells
@@ -0,0 +1,37 @@
+import os
+
+
+class FileWatcher:
+    """
+    Следит за изменением файлов по времени изменения и размеру.
+
+    Файлы не держатся открытыми и не перечитываются: каждая проверка — это один вызов stat на файл,
+    поэтому её можно выполнять раз в секунду без заметной нагрузки.
+    """
+    __slots__ = ('signatures',)
+
+    def __init__(self, paths: tuple[str, ...]):
+        self.signatures: dict[str, tuple[int, int] | None] = {path: self.get_signature(path) for path in paths}
+
+    @staticmethod
+    def get_signature(path: str) -> tuple[int, int] | None:
+        """Возвращает время изменения и размер файла или None, если файла нет."""
+        try:
+            stat: os.stat_result = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get_changed(self) -> list[str]:
+        """Возвращает файлы, изменившиеся с прошлой проверки."""
+        changed: list[str] = []
+        for path, signature in self.signatures.items():
+            current: tuple[int, int] | None = self.get_signature(path)
+            if current != signature:
+                self.signatures[path] = current
+                changed.append(path)
+        return changed
+
+    def mark(self, path: str) -> None:
+        """Запоминает текущее состояние файла, чтобы собственная запись программы не считалась изменением."""
+        self.signatures[path] = self.get_signature(path)
@@ -1,31 +1,35 @@
-import signal
-from time import sleep
+from argparse import ArgumentParser, Namespace
 
 from core.run import RunProgram
 
 run = RunProgram()
 
 
-def main(name: str, version: str, year: int) -> None:
-    """Запускающая все процессы главная функция."""
-
-    def get_handler(signum, _frame) -> None:
-        run.running = False
-        run.logger.info('Задействован обработчик сигналов для корректного завершения: %s', signum)
+def get_arguments() -> Namespace:
+    """Разбирает аргументы командной строки."""
+    parser = ArgumentParser(description='Консольное приложение для отслеживания курса криптовалют.')
+    parser.add_argument('--headless', action='store_true', help='фоновый режим без curses с HTTP-экспортом метрик')
+    parser.add_argument('--host', default='127.0.0.1', help='адрес HTTP-сервера метрик (по умолчанию 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=9108, help='порт HTTP-сервера метрик (по умолчанию 9108)')
+    parser.add_argument('--broker', action='store_true', help='фоновый режим с рассылкой курсов через Unix-сокет')
+    parser.add_argument(
+        '--socket', default='config_files/coinmonitor.sock', help='путь к Unix-сокету брокера курсов'
+    )
+    return parser.parse_args()
 
-    handler_tuple: tuple[str, str, str] = ('SIGHUP', 'SIGINT', 'SIGTERM')
-    for n in handler_tuple:
-        if hasattr(signal, n):
-            signal.signal(getattr(signal, n), get_handler)
 
+def main(name: str, version: str, year: int, arguments: Namespace) -> None:
+    """Запускающая все процессы главная функция."""
     try:
         run.create_directories()
-        run.get_logging_data()
+        run.get_logging_data('broker' if arguments.broker else None)
         run.log_app_release(name=name, version=version, year=year)
         run.logger.info('Приложение запущено.')
-        run.create_wrapped_threads()
-        while getattr(run, 'running', True):
-            sleep(0.1)
+        run.socket_path = arguments.socket
+        if arguments.headless or arguments.broker:
+            run.create_headless(arguments.host if arguments.headless else None, arguments.port, arguments.broker)
+        else:
+            run.create_wrapped_loop()
         run.logger.info('Приложение остановлено.')
     except Exception as e:
         run.logger.error(f'Проверка выдала ошибку: {e}\nЕсли не был выполнен выход в терминал, нажми Enter.')
@@ -39,4 +43,4 @@ def main(name: str, version: str, year: int) -> None:
 
 
 if __name__ == '__main__':
-    main('CoinMonitor', '1.0.3', 2026)
+    main('CoinMonitor', '1.0.3', 2026, get_arguments())
@@ -0,0 +1,65 @@
+"""Проверки движка оповещений с подменённым временем monotonic."""
+import pytest
+
+from core import alerts, rate_state
+from core.alerts import AlertEngine
+from core.rate_state import RateState
+
+PAIRS: list[tuple[str, str, str, str]] = [('BTC', 'USDT', 'BLUE', 'CYAN')]
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Время monotonic, которое тест переводит вручную."""
+    now: list[float] = [0.0]
+    monkeypatch.setattr(alerts, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_state, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_cooldown_counts_from_condition_clearing(clock: list[float]):
+    engine = AlertEngine(cooldown=300)
+    engine.compile([{'pair': 'BTC/USDT', 'type': 'above', 'value': 10}], PAIRS)
+    state = RateState(1)
+    fired: list[tuple[float, int]] = []
+    for moment, rate in ((0, 11), (600, 11), (601, 5), (602, 11), (900, 11), (901, 11), (902, 5), (1000, 11)):
+        clock[0] = moment
+        state.update([rate])
+        fired.append((moment, len(engine.evaluate(state))))
+    assert [moment for moment, count in fired if count] == [0, 901]
+
+
+def test_recompile_keeps_cooldown(clock: list[float]):
+    engine = AlertEngine(cooldown=300)
+    rules: list[dict] = [{'pair': 'BTC/USDT', 'type': 'above', 'value': 10}]
+    engine.compile(rules, PAIRS)
+    state = RateState(1)
+    state.update([11])
+    assert len(engine.evaluate(state)) == 1
+    clock[0] = 10
+    state.update([5])
+    engine.evaluate(state)
+
+    engine.compile([{'pair': 'BTC/USDT', 'type': 'below', 'value': 1}] + rules, PAIRS)
+    clock[0] = 20
+    state.update([11])
+    assert not engine.evaluate(state)
+
+
+def test_stale_follows_received_rates_not_changes(clock: list[float]):
+    engine = AlertEngine(cooldown=0)
+    engine.compile([{'pair': 'BTC/USDT', 'type': 'stale', 'value': 60}], PAIRS)
+    state = RateState(1)
+    for moment in (30, 90, 150):
+        clock[0] = moment
+        state.mark_received([0], moment)
+        state.update([1.0])
+        assert not engine.evaluate(state)
+
+    clock[0] = 200
+    state.update([1.0])
+    assert not engine.evaluate(state)
+    clock[0] = 211
+    state.update([1.0])
+    alerts_list: list[dict] = engine.evaluate(state)
+    assert [alert['type'] for alert in alerts_list] == ['stale']
@@ -0,0 +1,230 @@
+"""
+Проверки потока курсов против локальной замены биржи.
+
+Сервер отвечает в форматах Binance ticker/price и Coinbase exchange-rates и рассылает сообщения потока
+!miniTicker@arr по команде теста, поэтому сообщения, разрывы и переподключения происходят в известные моменты.
+"""
+import asyncio
+import shutil
+from pathlib import Path
+from time import monotonic
+
+import pytest
+from aiohttp import web
+
+from core.providers import BinanceProvider, CoinbaseProvider
+from core.run import RunProgram
+from core.scheduler import PollingScheduler
+
+ROOT: Path = Path(__file__).resolve().parent.parent
+
+
+class ExchangeStub:
+    """Локальная биржа с REST и WebSocket, считающая запросы и подключения к потоку."""
+
+    def __init__(self):
+        self.prices: dict[str, float] = {'BTCUSDT': 100.0}
+        self.usd_prices: dict[str, float] = {'USD': 1.0, 'ETH': 2000.0}
+        self.ticker_requests = 0
+        self.coinbase_requests: list[str] = []
+        self.connections: list[float] = []
+        self.sockets: set[web.WebSocketResponse] = set()
+        self.runner: web.AppRunner | None = None
+        self.port = 0
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    async def start(self) -> None:
+        """Запускает сервер; после перезапуска он слушает тот же порт."""
+        app = web.Application()
+        app.router.add_get('/api/v3/ticker/price', self.handle_ticker)
+        app.router.add_get('/v2/exchange-rates', self.handle_exchange_rates)
+        app.router.add_get('/ws', self.handle_stream)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', self.port).start()
+        self.port = self.runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Закрывает подключения к потоку и останавливает сервер."""
+        for websocket in list(self.sockets):
+            await websocket.close()
+        await self.runner.cleanup()
+
+    async def send(self, prices: dict[str, float]) -> None:
+        """Рассылает подключённым клиентам сообщение потока с новыми ценами."""
+        message: list[dict] = [
+            {'e': '24hrMiniTicker', 's': symbol, 'c': str(price)} for symbol, price in prices.items()
+        ]
+        for websocket in list(self.sockets):
+            await websocket.send_json(message)
+
+    async def handle_ticker(self, request: web.Request) -> web.Response:
+        self.ticker_requests += 1
+        return web.json_response([{'symbol': symbol, 'price': str(price)} for symbol, price in self.prices.items()])
+
+    async def handle_exchange_rates(self, request: web.Request) -> web.Response:
+        base: str = request.query['currency']
+        self.coinbase_requests.append(base)
+        if base not in self.usd_prices:
+            return web.json_response({'errors': [{'id': 'not_found'}]}, status=404)
+        rates: dict[str, str] = {name: str(self.usd_prices[base] / price) for name, price in self.usd_prices.items()}
+        return web.json_response({'data': {'currency': base, 'rates': rates}})
+
+    async def handle_stream(self, request: web.Request) -> web.WebSocketResponse:
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.sockets.add(websocket)
+        self.connections.append(monotonic())
+        try:
+            async for _ in websocket:
+                pass
+        finally:
+            self.sockets.discard(websocket)
+        return websocket
+
+
+@pytest.fixture
+def workdir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Рабочий каталог с копией настроек, чтобы программа не меняла файлы репозитория."""
+    shutil.copytree(
+        ROOT / 'config_files', tmp_path / 'config_files', ignore=shutil.ignore_patterns('history', '*.sock')
+    )
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def create_program(url: str) -> RunProgram:
+    """Создаёт программу с парой BTC/USDT из потока Binance и парой ETH/USD из опроса Coinbase."""
+    program = RunProgram()
+    program.history['enabled'] = False
+    program.rate_providers = {
+        'coinbase': CoinbaseProvider('coinbase', f'{url}/v2/exchange-rates?currency=', rate_limit=0),
+        'binance': BinanceProvider(
+            'binance', f'{url}/api/v3/ticker/price', rate_limit=0, stream_url=f'{url.replace("http", "ws", 1)}/ws'
+        )
+    }
+    program.coins = {
+        'BTC': {'currency': 'USDT', 'coin_color': 'BLUE', 'currency_color': 'CYAN', 'provider': 'binance'},
+        'ETH': {'currency': 'USD', 'coin_color': 'BLUE', 'currency_color': 'CYAN', 'provider': 'coinbase'}
+    }
+    program.pairs = program.create_pairs_list(program.coins)
+    program.verify_previous_rates(program.pairs)
+    program.create_streams(program.pairs)
+    return program
+
+
+async def wait_until(condition, timeout: float = 5.0) -> None:
+    """Ожидает выполнения условия, не дольше timeout секунд."""
+    deadline: float = monotonic() + timeout
+    while not condition():
+        if monotonic() > deadline:
+            raise AssertionError('Условие не выполнилось за отведённое время')
+        await asyncio.sleep(0.01)
+
+
+async def stop_program(program: RunProgram, task: asyncio.Task) -> None:
+    """Останавливает цикл потока и закрывает сессию HTTP."""
+    program.running = False
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await program.close_session()
+
+
+def test_stream_message_updates_rate_state(workdir: Path):
+    async def scenario() -> None:
+        stub = ExchangeStub()
+        await stub.start()
+        program: RunProgram = create_program(stub.url)
+        stream = program.streams[0]
+        task: asyncio.Task = asyncio.create_task(program.create_stream_loop(stream))
+        try:
+            await wait_until(lambda: program.rate_state.current[0] == 100.0)
+            assert stream.connected and stub.ticker_requests == 1
+
+            await stub.send({'BTCUSDT': 123.5})
+            await wait_until(lambda: program.rate_state.current[0] == 123.5)
+            assert stream.messages == 1
+            assert stub.ticker_requests == 1
+        finally:
+            await stop_program(program, task)
+            await stub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stream_reconnects_with_backoff_and_resyncs(workdir: Path, monkeypatch: pytest.MonkeyPatch):
+    delays: list[float] = []
+    fail = PollingScheduler.fail
+
+    def record_fail(self: PollingScheduler, key: str, retry_after: float | None = None) -> float:
+        delay: float = fail(self, key, retry_after)
+        delays.append(delay)
+        return delay
+
+    monkeypatch.setattr(PollingScheduler, 'fail', record_fail)
+
+    async def scenario() -> None:
+        stub = ExchangeStub()
+        await stub.start()
+        program: RunProgram = create_program(stub.url)
+        program.scheduler.min_interval = 0.05
+        stream = program.streams[0]
+        task: asyncio.Task = asyncio.create_task(program.create_stream_loop(stream))
+        try:
+            await wait_until(lambda: stream.connected and program.rate_state.current[0] == 100.0)
+
+            stub.prices['BTCUSDT'] = 105.0
+            closed_at: float = monotonic()
+            await stub.stop()
+            await wait_until(lambda: len(delays) >= 2)
+            assert not stream.connected
+            assert delays[1] >= delays[0]
+
+            await stub.start()
+            await wait_until(lambda: program.rate_state.current[0] == 105.0)
+            assert len(stub.connections) == 2
+            assert stub.connections[1] - closed_at >= delays[0]
+            assert stub.ticker_requests == 2
+            assert stream.connected and stream.messages == 0
+            assert 'binance:stream' not in program.scheduler.base_failures
+        finally:
+            await stop_program(program, task)
+            await stub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_connected_stream_pairs_are_not_polled(workdir: Path):
+    async def scenario() -> None:
+        stub = ExchangeStub()
+        await stub.start()
+        program: RunProgram = create_program(stub.url)
+        stream = program.streams[0]
+        task: asyncio.Task = asyncio.create_task(program.create_stream_loop(stream))
+        try:
+            await wait_until(lambda: stream.connected and program.rate_state.current[0] == 100.0)
+            stub.prices['BTCUSDT'] = 110.0
+
+            rates = await program._get_scheduled_rates()
+            assert stub.ticker_requests == 1
+            assert stub.coinbase_requests
+            assert rates.tolist() == [100.0, 2000.0]
+        finally:
+            await stop_program(program, task)
+
+        try:
+            program.scheduler.next_due[:] = 0
+            rates = await program._get_scheduled_rates()
+            assert stub.ticker_requests == 2
+            assert rates.tolist() == [110.0, 2000.0]
+        finally:
+            await program.close_session()
+            await stub.stop()
+
+    asyncio.run(scenario())